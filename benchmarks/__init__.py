@@ -0,0 +1,7 @@
+"""
+Benchmark suite for the summit hikes importer and API.
+Synthetic catalogs at multiples of hikes.json are imported with
+import_data.import_hikes and then served by simple_api to an in-process
+load generator; timings are saved as JSON so runs can be compared.
+Run with `python -m benchmarks --help`.
+"""
@@ -0,0 +1,129 @@
+"""
+Run the benchmark suite: for each scale, generate a synthetic catalog, time
+its import, then load-test the API on the imported database. Results are
+written as JSON and can be checked against an earlier run's file.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.api_bench import bench_api, load_app, point_link
+from benchmarks.import_bench import bench_import
+from benchmarks.synthetic import write_catalog
+from import_data import DEFAULT_BATCH_SIZE
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (a fraction) from baseline to results,
+    matching runs by scale."""
+    regressions = []
+
+    def check(label: str, old: float, new: float, higher_is_better: bool):
+        change = (new - old) / old if old else 0.0
+        if higher_is_better:
+            change = -change
+        marker = 'REGRESSION' if change > tolerance else 'ok'
+        print(f"  {label}: {old:,.2f} -> {new:,.2f} ({change:+.1%} worse) {marker}")
+        if change > tolerance:
+            regressions.append(label)
+
+    old_imports = {run['scale']: run for run in baseline.get('import', [])}
+    for run in results['import']:
+        old = old_imports.get(run['scale'])
+        if old is not None:
+            check(f"import {run['scale']}x hikes/s", old['hikes_per_second'], run['hikes_per_second'], True)
+
+    old_apis = {run['scale']: run for run in baseline.get('api', [])}
+    for run in results['api']:
+        old = old_apis.get(run['scale'])
+        if old is None:
+            continue
+        check(f"api {run['scale']}x requests/s", old['requests_per_second'], run['requests_per_second'], True)
+        for p in ('p50', 'p95', 'p99'):
+            check(f"api {run['scale']}x {p} ms", old['latency_ms'][p], run['latency_ms'][p], False)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the summit hikes importer and API.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 100], help="catalog sizes as multiples of hikes.json (e.g. 1 100 10000)")
+    parser.add_argument('--requests', type=int, default=1000, help="timed API requests per scale")
+    parser.add_argument('--concurrency', type=int, default=8, help="API requests in flight at once")
+    parser.add_argument('--warmup', type=int, default=50, help="untimed API requests sent first")
+    parser.add_argument('--cache', action='store_true', help="keep the response cache on (off by default so handlers are measured)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="importer batch size")
+    parser.add_argument('--workers', type=int, default=1, help="importer parsing processes")
+    parser.add_argument('--seed', type=int, default=0, help="seed for synthetic data and the request mix")
+    parser.add_argument('--workdir', type=Path, help="directory for generated catalogs and databases (default: a temporary one)")
+    parser.add_argument('--output', type=Path, default=Path('benchmark-results.json'), help="where to write results")
+    parser.add_argument('--baseline', type=Path, help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="fractional slowdown from --baseline counted as a regression")
+    args = parser.parse_args()
+    if min(args.scales) < 1:
+        parser.error("--scales must be at least 1")
+    if args.requests < 1 or args.concurrency < 1 or args.warmup < 0:
+        parser.error("--requests and --concurrency must be at least 1 and --warmup at least 0")
+
+    with tempfile.TemporaryDirectory(prefix='summit-hikes-bench-') as tempdir:
+        workdir = args.workdir or Path(tempdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        # The API serves a symlink that is re-pointed at each scale's database
+        db_link = workdir / 'served.db'
+        api = load_app(db_link, args.cache)
+
+        results: Dict[str, Any] = {
+            'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {
+                name: value for name, value in vars(args).items()
+                if name not in ('workdir', 'output', 'baseline', 'tolerance')
+            },
+            'import': [],
+            'api': []
+        }
+
+        for scale in args.scales:
+            json_path = workdir / f'hikes-{scale}x.ndjson'
+            db_path = workdir / f'hikes-{scale}x.db'
+            hike_count = write_catalog(json_path, scale, args.seed)
+
+            run = dict(scale=scale, **bench_import(json_path, db_path, hike_count, args.batch_size, args.workers))
+            results['import'].append(run)
+            print(f"import {scale}x: {hike_count:,} hikes in {run['seconds']:.2f}s ({run['hikes_per_second']:,.0f} hikes/s)")
+
+            point_link(db_link, db_path)
+            run = dict(scale=scale, **bench_api(
+                api, hike_count, args.requests, args.concurrency, args.warmup, args.seed
+            ))
+            results['api'].append(run)
+            latency = run['latency_ms']
+            print(
+                f"api {scale}x: {run['requests_per_second']:,.0f} requests/s, "
+                f"p50 {latency['p50']:.2f}ms p95 {latency['p95']:.2f}ms p99 {latency['p99']:.2f}ms, "
+                f"{run['errors']} errors"
+            )
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
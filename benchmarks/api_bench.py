@@ -0,0 +1,141 @@
+"""
+API load benchmark: drives simple_api in-process through an ASGI client
+with a weighted mix of /hikes filter, sort and search requests, and reports
+throughput and latency percentiles overall and per request kind.
+"""
+
+import asyncio
+import importlib
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# (name, weight, path) of each kind of request; {id} is a random hike id
+QUERY_MIX: List[Tuple[str, int, str]] = [
+    ('default', 10, '/hikes'),
+    ('easy_short', 8, '/hikes?max_difficulty=5&max_distance=10'),
+    ('fourteeners', 8, '/hikes?fourteeners_only=true&sort_by=highest_peak_elevation&sort_order=desc'),
+    ('near_denver', 8, '/hikes?max_distance_from_denver=60&sort_by=distance_from_denver'),
+    ('from_origin', 5, '/hikes?origin_lat=39.0&origin_lon=-106.0&max_distance_from_origin=50&sort_by=distance_from_origin'),
+    ('in_season', 6, '/hikes?in_season_only=true&sort_by=difficulty_rating'),
+    ('class_crowd', 6, '/hikes?max_class=2&max_crowd=3&sort_by=total_elevation_gain&sort_order=desc'),
+    ('time_window', 5, '/hikes?min_time=4&max_time=8&sort_by=hiking_time_min'),
+    ('search', 8, '/hikes?search=lake'),
+    ('search_ranked', 6, '/hikes?search=glacier%20peak&sort_by=relevance'),
+    ('search_prefix', 4, '/hikes?search=ridg'),
+    ('deep_page', 5, '/hikes?sort_by=name&offset=500&limit=50'),
+    ('large_page', 3, '/hikes?sort_by=round_trip_miles&limit=1000'),
+    ('detail', 8, '/hikes/{id}'),
+    ('similar', 4, '/hikes/{id}/similar')
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def load_app(db_link: Path, cache: bool):
+    """Import simple_api serving db_link. Settings are read at import, so
+    this must run before anything else in the process imports simple_api."""
+    if httpx is None:
+        raise RuntimeError("The API benchmark needs httpx (pip install httpx)")
+    os.environ['SUMMIT_HIKES_DB_PATH'] = str(db_link)
+    if not cache:
+        os.environ['SUMMIT_HIKES_CACHE_ENTRIES'] = '0'
+    return importlib.import_module('simple_api')
+
+
+def point_link(db_link: Path, db_path: Path):
+    """Atomically re-point the served symlink at db_path."""
+    staging = db_link.with_name(db_link.name + '.new')
+    staging.unlink(missing_ok=True)
+    staging.symlink_to(db_path.resolve())
+    os.replace(staging, db_link)
+
+
+def request_plan(count: int, hike_count: int, seed: int) -> List[Tuple[str, str]]:
+    """(name, path) for count requests drawn from the weighted mix."""
+    rng = random.Random(seed)
+    names = [name for name, _, _ in QUERY_MIX]
+    weights = [weight for _, weight, _ in QUERY_MIX]
+    paths = {name: path for name, _, path in QUERY_MIX}
+    plan = []
+    for name in rng.choices(names, weights, k=count):
+        plan.append((name, paths[name].replace('{id}', str(rng.randint(1, hike_count)))))
+    return plan
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Mean, max and percentile latencies in milliseconds."""
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    summary = {f'p{p}': round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary['mean'] = round(float(values.mean()), 3)
+    summary['max'] = round(float(values.max()), 3)
+    return summary
+
+
+async def run_requests(client, plan: List[Tuple[str, str]], concurrency: int) -> List[Tuple[str, float, int]]:
+    """Send every planned request with up to concurrency in flight, returning
+    (name, seconds, status) for each."""
+    results = []
+    pending = iter(plan)
+
+    async def worker():
+        for name, path in pending:
+            started = time.perf_counter()
+            response = await client.get(path)
+            results.append((name, time.perf_counter() - started, response.status_code))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def drive(app, plan: List[Tuple[str, str]], concurrency: int, warmup: int) -> Tuple[float, List[Tuple[str, float, int]]]:
+    """Run the app's lifespan, warm it up, then time the plan."""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+            await run_requests(client, plan[:warmup], concurrency)
+            started = time.perf_counter()
+            results = await run_requests(client, plan[warmup:], concurrency)
+            return time.perf_counter() - started, results
+
+
+def bench_api(
+    api,
+    hike_count: int,
+    requests: int = 1000,
+    concurrency: int = 8,
+    warmup: int = 50,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Load the already-imported simple_api module (see load_app) and report
+    throughput and latency for the request mix."""
+    plan = request_plan(warmup + requests, hike_count, seed)
+    elapsed, results = asyncio.run(drive(api.app, plan, concurrency, warmup))
+
+    by_query: Dict[str, Dict[str, Any]] = {}
+    for name, _, _ in QUERY_MIX:
+        latencies = [seconds for kind, seconds, _ in results if kind == name]
+        if latencies:
+            by_query[name] = dict(requests=len(latencies), **latency_summary(latencies))
+
+    return {
+        'hikes': hike_count,
+        'requests': len(results),
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 4),
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'errors': sum(1 for _, _, status in results if status >= 400),
+        'latency_ms': latency_summary([seconds for _, seconds, _ in results]),
+        'by_query': by_query
+    }
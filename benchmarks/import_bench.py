@@ -0,0 +1,50 @@
+"""
+Importer benchmark: times import_data.import_hikes on a catalog file.
+"""
+
+import contextlib
+import io
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from catalog_snapshot import snapshot_path
+from import_data import DEFAULT_BATCH_SIZE, import_hikes
+
+
+def remove_database(db_path: Path):
+    """Delete a database, its WAL files and its catalog snapshot if they exist."""
+    for path in (
+        db_path.with_name(db_path.name + '-wal'),
+        db_path.with_name(db_path.name + '-shm'),
+        snapshot_path(db_path),
+        db_path
+    ):
+        path.unlink(missing_ok=True)
+
+
+def bench_import(
+    json_path: Path,
+    db_path: Path,
+    hike_count: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1
+) -> Dict[str, Any]:
+    """Import json_path into a fresh db_path and report how long it took."""
+    remove_database(db_path)
+
+    # The importer's own summary is replaced by the benchmark report
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_hikes(json_path, db_path, batch_size=batch_size, workers=workers)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'hikes': hike_count,
+        'batch_size': batch_size,
+        'workers': workers,
+        'seconds': round(elapsed, 4),
+        'hikes_per_second': round(hike_count / elapsed, 1),
+        'source_bytes': json_path.stat().st_size,
+        'database_bytes': db_path.stat().st_size
+    }
@@ -0,0 +1,102 @@
+"""
+Synthetic hike catalogs for benchmarking.
+Every hike in hikes.json is used as a template: copy 0 is the original and
+later copies get a new number and name, jittered distance, time, elevation
+gain, difficulty and trailhead position, written in the source formats so
+the importer parses them like real data.
+"""
+
+import json
+import random
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+SOURCE_PATH = Path(__file__).parent.parent / 'hikes.json'
+
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+GPS_COORDINATE_PATTERN = re.compile(r"(\d+)°(\d+(?:\.\d+)?)'?\s*([NSEW])")
+
+# Largest trailhead shift in degrees, enough to spread copies over the state
+MAX_GPS_SHIFT = 0.5
+
+
+def load_templates(source_path: Path = SOURCE_PATH) -> List[Dict]:
+    """The real hikes that synthetic ones are derived from."""
+    with open(source_path, 'r') as f:
+        return json.load(f)
+
+
+def scale_numbers(text: str, factor: float) -> str:
+    """text with every number multiplied by factor, keeping its formatting
+    (thousands separators and decimal places)."""
+    def scale(match: re.Match) -> str:
+        original = match.group(0)
+        value = float(original.replace(',', '')) * factor
+        if '.' in original:
+            return f"{value:.{len(original.partition('.')[2])}f}"
+        if ',' in original:
+            return f"{round(value):,}"
+        return str(round(value))
+    return NUMBER_PATTERN.sub(scale, text)
+
+
+def shift_coordinates(gps: str, lat_shift: float, lon_shift: float) -> str:
+    """Trailhead GPS string moved by the given degrees."""
+    def shift(match: re.Match) -> str:
+        direction = match.group(3)
+        value = int(match.group(1)) + float(match.group(2)) / 60
+        value += lat_shift if direction in 'NS' else lon_shift
+        degrees = int(value)
+        return f"{degrees}°{(value - degrees) * 60:06.3f}' {direction}"
+    return GPS_COORDINATE_PATTERN.sub(shift, gps)
+
+
+def synthetic_hike(template: Dict, number: int, copy: int, rng: random.Random) -> Dict:
+    """A variation of template; copy 0 is the template itself."""
+    hike = dict(template, number=number)
+    if copy == 0:
+        return hike
+
+    hike['name'] = f"{template['name']} {copy + 1}"
+
+    # Longer routes take longer and climb more
+    factor = rng.uniform(0.7, 1.4)
+    for field in ('round_trip_distance', 'hiking_time', 'total_elevation_gain'):
+        if field in hike:
+            hike[field] = scale_numbers(hike[field], factor)
+
+    difficulty = re.search(r'(\d+(?:\.\d+)?)/10', hike.get('difficulty', ''))
+    if difficulty:
+        rating = min(max(float(difficulty.group(1)) + rng.choice((-1, 0, 0, 1)), 1), 10)
+        hike['difficulty'] = f"{rating:g}/10"
+
+    if 'trailhead_gps' in hike:
+        hike['trailhead_gps'] = shift_coordinates(
+            hike['trailhead_gps'],
+            rng.uniform(-MAX_GPS_SHIFT, MAX_GPS_SHIFT),
+            rng.uniform(-MAX_GPS_SHIFT, MAX_GPS_SHIFT)
+        )
+    return hike
+
+
+def generate_hikes(templates: List[Dict], scale: int, seed: int = 0) -> Iterator[Dict]:
+    """scale copies of every template with consecutive hike numbers."""
+    rng = random.Random(seed)
+    number = 0
+    for copy in range(scale):
+        for template in templates:
+            number += 1
+            yield synthetic_hike(template, number, copy, rng)
+
+
+def write_catalog(path: Path, scale: int, seed: int = 0, source_path: Path = SOURCE_PATH) -> int:
+    """Write a catalog scale times the size of source_path as NDJSON.
+    Returns the number of hikes written."""
+    count = 0
+    with open(path, 'w') as f:
+        for hike in generate_hikes(load_templates(source_path), scale, seed):
+            f.write(json.dumps(hike, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
@@ -0,0 +1,207 @@
+"""
+Memory-mapped binary snapshot of the hike catalog.
+import_data writes one next to the database after every import; API
+workers map it read-only at startup instead of reading the whole database,
+so columns are served straight from the OS page cache (shared by every
+worker) with nothing parsed per process.
+
+Layout (little-endian): a fixed header, a table of named sections, then
+each section's packed array, aligned to ALIGNMENT bytes. Text is stored as
+string tables: the concatenated UTF-8 bytes plus an offsets array (and a
+null flag per value where values may be missing). The header carries the
+database generation and a digest of its content hashes, so a snapshot left
+behind by a later write to the database is recognized as stale, and a CRC32
+of everything after the header to catch truncated or corrupt files.
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import orjson
+
+MAGIC = b'SHCATLOG'
+
+# Bumped whenever the layout or the meaning of a section changes; older
+# snapshots are then ignored until the next import rewrites them
+FORMAT_VERSION = 1
+
+# magic, version, flags, generation (inode, mtime_ns, WAL mtime_ns), origin
+# latitude and longitude, content key, hike count, section count, CRC32
+HEADER = struct.Struct('<8sII Qqq dd 32s QII')
+
+# name, NumPy dtype string, offset from the start of the file, item count
+SECTION = struct.Struct('<32s8sQQ')
+
+ALIGNMENT = 64
+
+# Header flags
+HAS_FULL_TEXT_INDEX = 1
+
+# Content key of a database with no content hashes
+NO_CONTENT_KEY = bytes(32)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is unreadable, corrupt or of another version."""
+
+
+class SnapshotHeader(NamedTuple):
+    flags: int
+    generation: Tuple[int, int, int]
+    origin: Tuple[float, float]
+    content_key: bytes
+    hike_count: int
+
+
+def snapshot_path(db_path: Path) -> Path:
+    """Snapshot file of a database: beside the file it resolves to, so a
+    re-pointed symlink picks up the matching snapshot."""
+    db_path = db_path.resolve()
+    return db_path.with_name(db_path.name + '.catalog')
+
+
+def content_key(conn: sqlite3.Connection) -> bytes:
+    """SHA-256 over every hike's source content hash, or NO_CONTENT_KEY for a
+    database without hike_hashes."""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hike_hashes'")
+    if cursor.fetchone() is None:
+        return NO_CONTENT_KEY
+    digest = hashlib.sha256()
+    for number, content_hash in conn.execute('SELECT number, content_hash FROM hike_hashes ORDER BY number'):
+        digest.update(f'{number}:{content_hash}\n'.encode())
+    return digest.digest()
+
+
+def pack_strings(name: str, values: Sequence[Optional[Union[str, bytes]]]) -> Dict[str, np.ndarray]:
+    """Sections of a string table: name.data, name.offsets and, if any value
+    is None, name.nulls. Text is stored UTF-8 encoded, bytes as they are."""
+    encoded = [b'' if value is None else value if isinstance(value, bytes) else value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    sections = {
+        f'{name}.data': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        f'{name}.offsets': offsets
+    }
+    if any(value is None for value in values):
+        sections[f'{name}.nulls'] = np.array([value is None for value in values], dtype=np.uint8)
+    return sections
+
+
+class StringTable:
+    """Read-only sequence of the strings in a snapshot string table, decoded
+    on access."""
+
+    def __init__(self, sections: Dict[str, np.ndarray], name: str):
+        self._data = sections[f'{name}.data']
+        self._offsets = sections[f'{name}.offsets']
+        self._nulls = sections.get(f'{name}.nulls')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+        """UTF-8 bytes of a value (empty for None)."""
+        return self._data[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if self._nulls is not None and self._nulls[index]:
+            return None
+        return self.raw(index).decode()
+
+
+class BytesTable(StringTable):
+    """String table whose values are returned as bytes, undecoded."""
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.raw(index)
+
+
+class CatalogSnapshot:
+    """A mapped snapshot file: its header and a read-only array per section.
+    Arrays are views into the mapping, which stays open while any is in use."""
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                # An empty file cannot be mapped
+                raise SnapshotError(f"{path} is empty") from e
+
+        buffer = self._mmap
+        if len(buffer) < HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        (
+            magic, version, flags, inode, mtime_ns, wal_mtime_ns, origin_lat, origin_lon,
+            key, hike_count, section_count, checksum
+        ) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a catalog snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        self.header = SnapshotHeader(flags, (inode, mtime_ns, wal_mtime_ns), (origin_lat, origin_lon), key, hike_count)
+        self._checksum = checksum
+
+        table_end = HEADER.size + section_count * SECTION.size
+        if len(buffer) < table_end:
+            raise SnapshotError(f"{path} is truncated")
+        self.sections: Dict[str, np.ndarray] = {}
+        for position in range(HEADER.size, table_end, SECTION.size):
+            name, dtype, offset, count = SECTION.unpack_from(buffer, position)
+            dtype = np.dtype(dtype.rstrip(b'\0').decode())
+            if offset + count * dtype.itemsize > len(buffer):
+                raise SnapshotError(f"{path} is truncated")
+            self.sections[name.rstrip(b'\0').decode()] = np.frombuffer(buffer, dtype, count, offset)
+
+    def verify(self):
+        """Raise SnapshotError unless the stored CRC32 matches the contents."""
+        if zlib.crc32(memoryview(self._mmap)[HEADER.size:]) != self._checksum:
+            raise SnapshotError("catalog snapshot checksum mismatch")
+
+    def json(self, name: str):
+        """Value of a section holding a JSON document."""
+        return orjson.loads(self.sections[name].tobytes())
+
+
+def write_snapshot(path: Path, header: SnapshotHeader, sections: Dict[str, np.ndarray]):
+    """Write sections to path atomically: readers see the old file or the
+    complete new one, never a partial write."""
+    table = []
+    offset = HEADER.size + len(sections) * SECTION.size
+    for name, values in sections.items():
+        values = np.ascontiguousarray(values)
+        offset += -offset % ALIGNMENT
+        table.append((name, values, offset))
+        offset += values.nbytes
+
+    body = bytearray(offset - HEADER.size)
+    for position, (name, values, section_offset) in enumerate(table):
+        SECTION.pack_into(
+            body, position * SECTION.size,
+            name.encode(), values.dtype.str.encode(), section_offset, len(values)
+        )
+        start = section_offset - HEADER.size
+        body[start:start + values.nbytes] = values.tobytes()
+
+    inode, mtime_ns, wal_mtime_ns = header.generation
+    origin_lat, origin_lon = header.origin
+    header_bytes = HEADER.pack(
+        MAGIC, FORMAT_VERSION, header.flags, inode, mtime_ns, wal_mtime_ns, origin_lat, origin_lon,
+        header.content_key, header.hike_count, len(table), zlib.crc32(body)
+    )
+
+    staging = path.with_name(path.name + '.tmp')
+    with open(staging, 'wb') as f:
+        f.write(header_bytes)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
@@ -0,0 +1,169 @@
+"""
+Concurrency controls for the summit hikes API.
+Blocking database and catalog work runs on a dedicated, bounded thread pool
+instead of Starlette's shared one, and requests beyond a concurrency limit
+wait in a short queue or are turned away with 429 rather than piling up.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, Optional, Sequence
+
+
+# Returned by next() on the pool in place of raising StopIteration, which
+# cannot be raised into a coroutine
+_EXHAUSTED = object()
+
+
+class BlockingExecutor:
+    """Bounded thread pool for running blocking calls from async handlers."""
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "blocking"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """The thread pool, started on first use (and again after shutdown)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, self.thread_name_prefix)
+            return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result. It runs
+        in a copy of the caller's context, so context variables carry over."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+    def asynchronous(self, fn: Callable) -> Callable:
+        """Decorate a blocking function as an async function running on the
+        pool. The signature is kept, so it can decorate FastAPI endpoints."""
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await self.run(fn, *args, **kwargs)
+        return wrapper
+
+    async def iterate(self, iterator: Iterator) -> AsyncIterator:
+        """Async iterator over a blocking iterator (such as a streaming
+        response body), producing each item on the pool. The iterator is
+        closed there too if iteration stops early."""
+        iterator = iter(iterator)
+        try:
+            while True:
+                item = await self.run(next, iterator, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                await self.run(close)
+
+    def shutdown(self):
+        """Stop the pool once queued calls finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def inline_dependency(factory: Callable) -> Callable:
+    """Wrap a cheap synchronous callable, such as a dependency class, as an
+    async function so FastAPI calls it directly rather than via a threadpool."""
+    @functools.wraps(factory, updated=())
+    async def wrapper(*args, **kwargs):
+        return factory(*args, **kwargs)
+    return wrapper
+
+
+class ConcurrencyCounters:
+    """Requests a ConcurrencyLimitMiddleware is handling, has queued and has
+    turned away, shared with whatever reports them."""
+
+    def __init__(self):
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware admitting at most max_concurrent requests under the
+    path prefixes at once. Up to max_queued more wait up to queue_timeout
+    seconds for a slot; anything beyond gets 429 with Retry-After. Request
+    counts are kept in counters."""
+
+    def __init__(
+        self,
+        app,
+        max_concurrent: int,
+        max_queued: int,
+        path_prefixes: Sequence[str],
+        queue_timeout: float = 5.0,
+        retry_after: int = 1,
+        counters: Optional[ConcurrencyCounters] = None
+    ):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.path_prefixes = tuple(path_prefixes)
+        self.queue_timeout = queue_timeout
+        self.retry_after = str(retry_after).encode()
+        self.counters = counters if counters is not None else ConcurrencyCounters()
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        counters = self.counters
+        if not await self._admit():
+            counters.rejected += 1
+            await self._send_too_many_requests(send)
+            return
+
+        counters.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            counters.active -= 1
+            self._slots.release()
+
+    async def _admit(self) -> bool:
+        """Take a slot, queueing if there is room. Returns whether one was taken."""
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        counters = self.counters
+        if counters.waiting >= self.max_queued:
+            return False
+
+        counters.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            counters.waiting -= 1
+
+    async def _send_too_many_requests(self, send):
+        body = b'{"detail":"Too many requests, try again shortly"}'
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', self.retry_after)
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
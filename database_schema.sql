@@ -73,16 +73,115 @@ CREATE TABLE climbing_seasons (
     CHECK (end_month >= 1 AND end_month <= 12)
 );
 
+-- Denormalized hike rows with peak, trailhead and season summaries,
+-- rebuilt by import_data.rebuild_hike_summaries after every import
+CREATE TABLE hike_summaries (
+    id INTEGER PRIMARY KEY,
+    number INTEGER NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    round_trip_miles REAL NOT NULL,
+    hiking_time_min REAL NOT NULL,
+    hiking_time_max REAL NOT NULL,
+    difficulty_rating REAL NOT NULL,
+    difficulty_label TEXT NOT NULL,
+    class_numeric REAL NOT NULL,
+    class_text TEXT NOT NULL,
+    start_elevation INTEGER NOT NULL,
+    total_elevation_gain INTEGER NOT NULL,
+    terrain TEXT NOT NULL,
+    crowd_level_numeric INTEGER NOT NULL,
+    crowd_level_text TEXT NOT NULL,
+    is_overnight BOOLEAN DEFAULT FALSE,
+    gear_advisor TEXT,
+    location TEXT,
+    
+    -- Peak summary
+    all_peaks TEXT,
+    highest_peak_elevation INTEGER,
+    peak_count INTEGER NOT NULL DEFAULT 0,
+    
+    -- Primary (first) trailhead
+    latitude REAL,
+    longitude REAL,
+    trailhead_name TEXT,
+    
+    -- Season summary, e.g. "6-9" or "11-3, 6-9"
+    season_months TEXT,
+    season_text TEXT
+);
+
+-- Content hash of each source hike as last imported, so a re-import only
+-- rewrites hikes whose source changed
+CREATE TABLE hike_hashes (
+    number INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL
+);
+
+-- Position of an import in progress, so an interrupted load can resume
+-- after its last committed batch; emptied when the import completes
+CREATE TABLE import_progress (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    source TEXT NOT NULL,
+    hikes_committed INTEGER NOT NULL,
+    last_number INTEGER NOT NULL
+);
+
 -- Indexes for common filter/sort operations
-CREATE INDEX idx_hikes_difficulty ON hikes(difficulty_rating);
-CREATE INDEX idx_hikes_class ON hikes(class_numeric);
-CREATE INDEX idx_hikes_crowd ON hikes(crowd_level_numeric);
-CREATE INDEX idx_hikes_elevation_gain ON hikes(total_elevation_gain);
-CREATE INDEX idx_hikes_distance ON hikes(round_trip_miles);
-CREATE INDEX idx_hikes_start_elevation ON hikes(start_elevation);
-CREATE INDEX idx_hikes_time ON hikes(hiking_time_max);
-CREATE INDEX idx_peaks_elevation ON peaks(elevation);
-CREATE INDEX idx_peaks_hike ON peaks(hike_id);
+CREATE INDEX IF NOT EXISTS idx_hikes_difficulty ON hikes(difficulty_rating);
+CREATE INDEX IF NOT EXISTS idx_hikes_class ON hikes(class_numeric);
+CREATE INDEX IF NOT EXISTS idx_hikes_crowd ON hikes(crowd_level_numeric);
+CREATE INDEX IF NOT EXISTS idx_hikes_elevation_gain ON hikes(total_elevation_gain);
+CREATE INDEX IF NOT EXISTS idx_hikes_distance ON hikes(round_trip_miles);
+CREATE INDEX IF NOT EXISTS idx_hikes_start_elevation ON hikes(start_elevation);
+CREATE INDEX IF NOT EXISTS idx_hikes_time ON hikes(hiking_time_max);
+CREATE INDEX IF NOT EXISTS idx_peaks_elevation ON peaks(elevation);
+CREATE INDEX IF NOT EXISTS idx_peaks_hike ON peaks(hike_id);
+-- Peaks of a set of hikes, highest first, read in index order
+CREATE INDEX IF NOT EXISTS idx_peaks_hike_elevation ON peaks(hike_id, elevation DESC);
+CREATE INDEX IF NOT EXISTS idx_trailheads_hike ON trailheads(hike_id);
+CREATE INDEX IF NOT EXISTS idx_seasons_hike ON climbing_seasons(hike_id);
+CREATE INDEX IF NOT EXISTS idx_summaries_highest_peak ON hike_summaries(highest_peak_elevation);
+-- Covering indexes for the /stats difficulty and class distributions
+CREATE INDEX IF NOT EXISTS idx_summaries_difficulty_label ON hike_summaries(difficulty_rating, difficulty_label);
+CREATE INDEX IF NOT EXISTS idx_summaries_class_text ON hike_summaries(class_numeric, class_text);
+-- Superseded by the covering indexes above; dropped from existing databases
+DROP INDEX IF EXISTS idx_summaries_difficulty;
+DROP INDEX IF EXISTS idx_summaries_class;
+CREATE INDEX IF NOT EXISTS idx_summaries_distance ON hike_summaries(round_trip_miles);
+CREATE INDEX IF NOT EXISTS idx_summaries_elevation_gain ON hike_summaries(total_elevation_gain);
+CREATE INDEX IF NOT EXISTS idx_summaries_time ON hike_summaries(hiking_time_max);
+
+-- Full-text search over hike text; external content table kept in sync
+-- with hikes by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS hikes_fts USING fts5(
+    name,
+    description,
+    terrain,
+    gear_advisor,
+    location,
+    content='hikes',
+    content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS hikes_fts_insert AFTER INSERT ON hikes BEGIN
+    INSERT INTO hikes_fts (rowid, name, description, terrain, gear_advisor, location)
+    VALUES (new.id, new.name, new.description, new.terrain, new.gear_advisor, new.location);
+END;
+
+CREATE TRIGGER IF NOT EXISTS hikes_fts_delete AFTER DELETE ON hikes BEGIN
+    INSERT INTO hikes_fts (hikes_fts, rowid, name, description, terrain, gear_advisor, location)
+    VALUES ('delete', old.id, old.name, old.description, old.terrain, old.gear_advisor, old.location);
+END;
+
+CREATE TRIGGER IF NOT EXISTS hikes_fts_update AFTER UPDATE ON hikes BEGIN
+    INSERT INTO hikes_fts (hikes_fts, rowid, name, description, terrain, gear_advisor, location)
+    VALUES ('delete', old.id, old.name, old.description, old.terrain, old.gear_advisor, old.location);
+    INSERT INTO hikes_fts (rowid, name, description, terrain, gear_advisor, location)
+    VALUES (new.id, new.name, new.description, new.terrain, new.gear_advisor, new.location);
+END;
 
 -- Views for common queries
 CREATE VIEW hikes_with_peaks AS
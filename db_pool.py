@@ -0,0 +1,190 @@
+"""
+Thread-safe pool of read-only SQLite connections for the summit hikes API.
+Connections are opened once with read-oriented pragmas and reused, so each
+request skips opening the file, parsing the schema and preparing statements.
+When a new database file replaces the served one, requests move to a fresh
+pool while the old one drains.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+def database_identity(db_path: Path) -> Tuple[int, int]:
+    """(device, inode) of the file at db_path, following symlinks. Changes
+    when a new database is renamed or symlinked into place."""
+    stat = db_path.stat()
+    return stat.st_dev, stat.st_ino
+
+
+def database_generation(db_path: Path) -> Tuple[int, int, int]:
+    """Token that changes whenever the database file is replaced or it or its
+    WAL is written. An empty WAL (as created by a reader opening the database)
+    is ignored."""
+    db_path = db_path.resolve()
+    wal_path = db_path.with_name(db_path.name + '-wal')
+    try:
+        wal_stat = wal_path.stat()
+        wal_mtime_ns = wal_stat.st_mtime_ns if wal_stat.st_size else 0
+    except FileNotFoundError:
+        wal_mtime_ns = 0
+    stat = db_path.stat()
+    return stat.st_ino, stat.st_mtime_ns, wal_mtime_ns
+
+
+def generation_label(generation: Tuple[int, ...]) -> str:
+    """Short opaque label for a database generation, for clients to compare."""
+    return hashlib.blake2b(repr(generation).encode(), digest_size=8).hexdigest()
+
+
+def connect_read_only(db_path: Path, **kwargs) -> sqlite3.Connection:
+    """Open the database read-only; fails rather than creating a missing file.
+    Keyword arguments are passed on to sqlite3.connect."""
+    return sqlite3.connect(f"{db_path.absolute().as_uri()}?mode=ro", uri=True, **kwargs)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Bounded pool of read-only connections to one database file."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        size: int = 8,
+        statement_cache_size: int = 64,
+        cache_size_kib: int = 8192,
+        mmap_size: int = 64 * 1024 * 1024,
+        timeout: float = 5.0
+    ):
+        self.db_path = db_path
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.timeout = timeout
+
+        # Idle connections are reused most-recently-released first so hot
+        # connections keep their page and statement caches warm
+        self._idle: List[sqlite3.Connection] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new read-only connection with tuned pragmas."""
+        conn = connect_read_only(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection, waiting up to the pool timeout for one to free up."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a borrowed connection to the pool."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.append(conn)
+        self._slots.release()
+
+    def close(self):
+        """Close every idle connection. Connections still borrowed are closed
+        when they are released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait up to timeout for borrowed connections to be returned, then
+        close the pool. Connections returned later are closed on release.
+        Returns whether every connection came back in time."""
+        deadline = time.monotonic() + timeout
+        returned = 0
+        while returned < self.size:
+            if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                break
+            returned += 1
+
+        self.close()
+
+        for _ in range(returned):
+            self._slots.release()
+        return returned == self.size
+
+
+class ActivePool:
+    """Connection pool for whichever file is at db_path. When refresh finds a
+    different file there (renamed or symlinked into place), new requests get
+    a fresh pool and the old one is drained in the background, so in-flight
+    requests finish on the database they started with."""
+
+    def __init__(self, db_path: Path, drain_timeout: float = 30.0, **pool_options):
+        self.db_path = db_path
+        self.drain_timeout = drain_timeout
+        self.pool_options = pool_options
+        self._pool: Optional[ConnectionPool] = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> ConnectionPool:
+        """Pool for the database being served."""
+        pool = self._pool
+        if pool is None:
+            pool = self.refresh()
+        return pool
+
+    def refresh(self) -> ConnectionPool:
+        """Switch to a new pool if the file at db_path has been replaced."""
+        with self._lock:
+            identity = database_identity(self.db_path)
+            if self._pool is not None and identity == self._identity:
+                return self._pool
+
+            # Open the resolved file so connections (and their WAL) stay with
+            # it even if a symlink at db_path is later re-pointed
+            old_pool = self._pool
+            self._pool = ConnectionPool(self.db_path.resolve(), **self.pool_options)
+            self._identity = identity
+
+        if old_pool is not None:
+            threading.Thread(target=old_pool.drain, args=(self.drain_timeout,), daemon=True).start()
+        return self._pool
+
+    def close(self):
+        """Close the current pool; its borrowed connections are closed when
+        released. A later request opens a new pool."""
+        with self._lock:
+            pool, self._pool, self._identity = self._pool, None, None
+        if pool is not None:
+            pool.close()
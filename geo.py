@@ -0,0 +1,153 @@
+"""
+Great-circle distance helpers for trailhead coordinates.
+Distances are computed with the Haversine formula for every trailhead at
+once, reusing the per-trailhead trig terms across requests, and a grid
+index narrows radius, bounding-box and nearest-neighbour queries.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_MILES = 3959
+
+# Denver coordinates (downtown Denver), the origin of distance_from_denver
+DENVER_LAT = 39.7392
+DENVER_LON = -104.9903
+
+
+class TrailheadPoints:
+    """Trailhead coordinates with their radian and cosine terms precomputed.
+    Missing coordinates are NaN and produce NaN distances."""
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.lat_rad = np.radians(self.latitudes)
+        self.lon_rad = np.radians(self.longitudes)
+        self.cos_lat = np.cos(self.lat_rad)
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def distances_from(self, lat: float, lon: float, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """Crow-flies distance in miles from (lat, lon) to every trailhead,
+        or only to the trailheads at the given indices."""
+        lat_rad, lon_rad, cos_lat = self.lat_rad, self.lon_rad, self.cos_lat
+        if indices is not None:
+            lat_rad, lon_rad, cos_lat = lat_rad[indices], lon_rad[indices], cos_lat[indices]
+
+        origin_lat = np.radians(lat)
+        origin_lon = np.radians(lon)
+
+        half_dlat = np.sin((lat_rad - origin_lat) / 2)
+        half_dlon = np.sin((lon_rad - origin_lon) / 2)
+        a = half_dlat ** 2 + np.cos(origin_lat) * cos_lat * half_dlon ** 2
+
+        # Clip guards against rounding pushing a just above 1 for antipodes
+        return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Miles spanned by one degree of latitude
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * np.pi / 180
+
+
+class GridIndex:
+    """Bucket index over trailhead points on a fixed lat/lon grid.
+    Radius, bounding-box and nearest-neighbour queries only compute exact
+    distances for points in the grid cells that can contain a match."""
+
+    def __init__(self, points: TrailheadPoints, cell_degrees: float = 0.25):
+        self.points = points
+        self.cell_degrees = cell_degrees
+
+        valid = np.flatnonzero(~np.isnan(points.latitudes) & ~np.isnan(points.longitudes))
+        cell_rows = np.floor(points.latitudes[valid] / cell_degrees).astype(np.int64)
+        cell_cols = np.floor(points.longitudes[valid] / cell_degrees).astype(np.int64)
+
+        self.cells = {}
+        for row, col, index in zip(cell_rows.tolist(), cell_cols.tolist(), valid.tolist()):
+            self.cells.setdefault((row, col), []).append(index)
+        self.cells = {cell: np.array(indices, dtype=np.int64) for cell, indices in self.cells.items()}
+        self.size = len(valid)
+
+        if self.cells:
+            rows, cols = zip(*self.cells)
+            self.row_range = (min(rows), max(rows))
+            self.col_range = (min(cols), max(cols))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell (row, col) containing a coordinate."""
+        return int(np.floor(lat / self.cell_degrees)), int(np.floor(lon / self.cell_degrees))
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Indices of points in every cell overlapping the bounding box."""
+        if not self.cells:
+            return np.empty(0, dtype=np.int64)
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        min_row, max_row = max(min_row, self.row_range[0]), min(max_row, self.row_range[1])
+        min_col, max_col = max(min_col, self.col_range[0]), min(max_col, self.col_range[1])
+
+        found = [
+            self.cells[(row, col)]
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            if (row, col) in self.cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Indices of points inside the bounding box."""
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats = self.points.latitudes[candidates]
+        lons = self.points.longitudes[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return candidates[inside]
+
+    def within_radius(self, lat: float, lon: float, radius: float) -> np.ndarray:
+        """Indices of points within radius miles of (lat, lon)."""
+        lat_span = radius / MILES_PER_DEGREE
+        min_lat, max_lat = max(lat - lat_span, -90.0), min(lat + lat_span, 90.0)
+
+        # A degree of longitude is shortest at the box edge nearest a pole
+        cos_edge = np.cos(np.radians(max(abs(min_lat), abs(max_lat))))
+        if cos_edge <= lat_span / 180:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            lon_span = lat_span / cos_edge
+            min_lon, max_lon = lon - lon_span, lon + lon_span
+
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        distances = self.points.distances_from(lat, lon, candidates)
+        return candidates[distances <= radius]
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The k points closest to (lat, lon) as (indices, distances), nearest first."""
+        k = min(k, self.size)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        # Grow a square of cells around the origin until it holds k points;
+        # the k-th of those bounds the radius that must hold the true k nearest
+        row, col = self._cell(lat, lon)
+        ring = max(
+            0,
+            self.row_range[0] - row, row - self.row_range[1],
+            self.col_range[0] - col, col - self.col_range[1]
+        )
+        while True:
+            candidates = self._candidates(
+                (row - ring) * self.cell_degrees, (col - ring) * self.cell_degrees,
+                (row + ring) * self.cell_degrees, (col + ring) * self.cell_degrees
+            )
+            if len(candidates) >= k:
+                break
+            ring += 1
+
+        bound = np.partition(self.points.distances_from(lat, lon, candidates), k - 1)[k - 1]
+        candidates = self.within_radius(lat, lon, bound)
+        distances = self.points.distances_from(lat, lon, candidates)
+        order = np.argsort(distances, kind='stable')[:k]
+        return candidates[order], distances[order]
@@ -0,0 +1,446 @@
+"""
+In-memory columnar catalog for the summit hikes API.
+Loads hikes, peaks, trailheads and climbing seasons once and answers
+filtering, sorting and pagination with NumPy masks and argsorts. When the
+database has a current catalog snapshot the catalog is mapped from it
+instead of read from the database.
+"""
+
+import bisect
+import logging
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import orjson
+
+from catalog_snapshot import (
+    HAS_FULL_TEXT_INDEX, NO_CONTENT_KEY, BytesTable, CatalogSnapshot, SnapshotError, SnapshotHeader,
+    StringTable, content_key, pack_strings, snapshot_path, write_snapshot
+)
+from db_pool import connect_read_only, database_generation, generation_label
+from geo import GridIndex, TrailheadPoints
+from hike_facets import FacetIndex
+from hike_similarity import SimilarityIndex
+from hike_search import has_full_text_index
+from season_calendar import SeasonCalendar
+
+
+# Columns kept as float arrays for filtering and sorting (NULL -> NaN)
+NUMERIC_COLUMNS = (
+    'id', 'number', 'round_trip_miles', 'hiking_time_min', 'hiking_time_max',
+    'difficulty_rating', 'class_numeric', 'start_elevation',
+    'total_elevation_gain', 'crowd_level_numeric', 'is_overnight',
+    'highest_peak_elevation', 'peak_count', 'latitude', 'longitude',
+    'distance_from_denver',
+)
+
+# Text columns sorted through a precomputed rank array
+RANKED_TEXT_COLUMNS = ('name',)
+
+catalog_log = logging.getLogger('summit_hikes.catalog')
+
+
+def season_ranges(records: List[Dict[str, Any]]) -> List[List[Tuple[int, int]]]:
+    """(start_month, end_month) of each record's climbing seasons."""
+    return [
+        [(season['start_month'], season['end_month']) for season in record['climbing_seasons']]
+        for record in records
+    ]
+
+
+class SnapshotRecords:
+    """Catalog records of a snapshot, decoded from their JSON on access."""
+
+    def __init__(self, row_json: BytesTable):
+        self.row_json = row_json
+
+    def __len__(self) -> int:
+        return len(self.row_json)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        return orjson.loads(self.row_json[row] + b'}')
+
+
+class SortedText:
+    """(text, id) pairs of a ranked text column in sort order, read from a
+    snapshot on access; bisect searches it like the list it replaces."""
+
+    def __init__(self, values: StringTable, order: np.ndarray, ids: np.ndarray):
+        self.values = values
+        self.order = order
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, position: int) -> Tuple[str, int]:
+        row = self.order[position]
+        return self.values[row], int(self.ids[row])
+
+
+class HikeCatalog:
+    """Column store of every hike, built from one pass over the database."""
+
+    def __init__(
+        self,
+        records: List[Dict[str, Any]],
+        trailheads: TrailheadPoints,
+        trailhead_names: List[Optional[str]],
+        generation: Tuple[int, ...],
+        has_full_text_index: bool = False
+    ):
+        # Records are ordered by hike id; array position is the row index
+        self.records = records
+        self.trailheads = trailheads
+        self.trailhead_names = trailhead_names
+        self.generation = generation
+        self.generation_label = generation_label(generation)
+        self.has_full_text_index = has_full_text_index
+        self.columns: Dict[str, np.ndarray] = {}
+
+        for name in NUMERIC_COLUMNS:
+            self.columns[name] = np.array(
+                [np.nan if record[name] is None else record[name] for record in records],
+                dtype=np.float64
+            )
+
+        # Text is sorted by rank; the sorted (text, id) pairs map cursor
+        # positions back into rank space
+        self.sorted_text: Dict[str, List[Tuple[str, int]]] = {}
+        for name in RANKED_TEXT_COLUMNS:
+            values = [record[name] for record in records]
+            order = sorted(range(len(values)), key=values.__getitem__)
+            ranks = np.empty(len(values), dtype=np.float64)
+            ranks[order] = np.arange(len(values))
+            self.columns[name] = ranks
+            self.sorted_text[name] = [(values[i], records[i]['id']) for i in order]
+
+        # Each record pre-serialized without its closing brace, so responses
+        # only encode the per-request fields
+        self.row_json = [orjson.dumps(record)[:-1] for record in records]
+
+        # Lowercased name and description, built by the first search
+        self.search_columns: Optional[Dict[str, np.ndarray]] = None
+
+        # A non-null value of each field (None if always null; a float if any
+        # is), for typing columnar responses consistently across pages
+        self.field_samples: Dict[str, Any] = {}
+        for record in records:
+            for name, value in record.items():
+                sample = self.field_samples.get(name)
+                if sample is None or (isinstance(value, float) and isinstance(sample, int)):
+                    self.field_samples[name] = value
+
+        seasons_per_row = season_ranges(records)
+        self.season_calendar = SeasonCalendar(seasons_per_row)
+        self.similarity_index = SimilarityIndex(self.columns, seasons_per_row)
+        self._build_indexes()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CatalogSnapshot, generation: Tuple[int, ...]) -> 'HikeCatalog':
+        """Catalog over a mapped snapshot. Columns are views into the mapping
+        and records are decoded from their JSON only when a response needs them."""
+        sections = snapshot.sections
+        catalog = cls.__new__(cls)
+        catalog.row_json = BytesTable(sections, 'row_json')
+        catalog.records = SnapshotRecords(catalog.row_json)
+        catalog.trailheads = TrailheadPoints(sections['trailheads.latitude'], sections['trailheads.longitude'])
+        catalog.trailhead_names = StringTable(sections, 'trailhead_names')
+        catalog.generation = generation
+        catalog.generation_label = generation_label(generation)
+        catalog.has_full_text_index = bool(snapshot.header.flags & HAS_FULL_TEXT_INDEX)
+        catalog.columns = {name: sections[f'columns.{name}'] for name in NUMERIC_COLUMNS + RANKED_TEXT_COLUMNS}
+        catalog.sorted_text = {
+            name: SortedText(StringTable(sections, f'text.{name}'), sections[f'order.{name}'], catalog.columns['id'])
+            for name in RANKED_TEXT_COLUMNS
+        }
+        catalog.search_columns = None
+        catalog.field_samples = snapshot.json('field_samples')
+        catalog.season_calendar = SeasonCalendar.from_bitmap(sections['season_calendar'])
+        catalog.similarity_index = SimilarityIndex.from_matrix(sections['similarity_matrix'])
+        catalog._build_indexes()
+        return catalog
+
+    def _build_indexes(self):
+        """Indexes derived from the columns, however the catalog was loaded."""
+        self.row_index = {int(hike_id): i for i, hike_id in enumerate(self.columns['id'].tolist())}
+        self.trailhead_index = GridIndex(self.trailheads)
+        self.facet_index = FacetIndex(self.columns)
+
+    def snapshot_sections(self) -> Dict[str, np.ndarray]:
+        """Everything from_snapshot needs, as snapshot sections."""
+        records = self.records
+        sections = {f'columns.{name}': values for name, values in self.columns.items()}
+        for name, pairs in self.sorted_text.items():
+            sections[f'order.{name}'] = np.array([self.row_index[hike_id] for _, hike_id in pairs], dtype=np.int64)
+            sections.update(pack_strings(f'text.{name}', [record[name] for record in records]))
+        sections.update(pack_strings('row_json', self.row_json))
+        sections['trailheads.latitude'] = self.trailheads.latitudes
+        sections['trailheads.longitude'] = self.trailheads.longitudes
+        sections.update(pack_strings('trailhead_names', self.trailhead_names))
+        sections['season_calendar'] = self.season_calendar.bitmap.ravel()
+        sections['similarity_matrix'] = self.similarity_index.matrix.ravel()
+        sections['field_samples'] = np.frombuffer(orjson.dumps(self.field_samples), dtype=np.uint8)
+        return sections
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def match_all(self) -> np.ndarray:
+        """Mask selecting every hike."""
+        return np.ones(len(self.records), dtype=bool)
+
+    def search(self, term: str) -> np.ndarray:
+        """Mask of hikes whose name or description contains term.
+        Used when the database has no full-text index."""
+        if self.search_columns is None:
+            # Lowercased for case-insensitive substring search (like SQL LIKE)
+            records = [self.records[row] for row in range(len(self.records))]
+            self.search_columns = {
+                name: np.array([(record[name] or '').lower() for record in records], dtype=str)
+                for name in ('name', 'description')
+            }
+
+        term = term.lower()
+        mask = np.zeros(len(self.records), dtype=bool)
+        for values in self.search_columns.values():
+            mask |= np.char.find(values, term) >= 0
+        return mask
+
+    def mask_of(self, indices: np.ndarray) -> np.ndarray:
+        """Mask selecting the given row indices."""
+        mask = np.zeros(len(self.records), dtype=bool)
+        mask[indices] = True
+        return mask
+
+    def scores(self, scored_ids: Iterable[Tuple[int, float]]) -> np.ndarray:
+        """Per-row array of the given (hike id, score) pairs, NaN where unscored."""
+        scores = np.full(len(self.records), np.nan)
+        for hike_id, score in scored_ids:
+            row = self.row_index.get(hike_id)
+            if row is not None:
+                scores[row] = score
+        return scores
+
+    def distances_from(self, lat: float, lon: float) -> np.ndarray:
+        """Distance in miles (rounded to 0.1) from (lat, lon) to each hike's trailhead."""
+        return np.round(self.trailheads.distances_from(lat, lon), 1)
+
+    def sort(self, mask: np.ndarray, keys: np.ndarray, descending: bool = False) -> np.ndarray:
+        """Row indices selected by mask, ordered by the per-row keys.
+        Matches SQLite ordering: NULLs (NaN) first and ties by ascending id,
+        with descending order being the exact reverse."""
+        rows = np.flatnonzero(mask)
+        keys = keys[rows]
+        nulls = np.isnan(keys)
+        keys = np.where(nulls, 0.0, keys)
+
+        # Rows are already in id order, so a stable sort breaks ties by id
+        order = np.lexsort((keys, ~nulls))
+        if descending:
+            order = order[::-1]
+        return rows[order]
+
+    def cursor_key(self, sort_by: str, keys: np.ndarray, row: int) -> Optional[Union[float, str]]:
+        """Sort key of a row as stored in a pagination cursor."""
+        if sort_by in self.sorted_text:
+            return self.records[row][sort_by]
+        key = keys[row]
+        return None if math.isnan(key) else float(key)
+
+    def after_cursor(
+        self,
+        sort_by: str,
+        keys: np.ndarray,
+        key: Optional[Union[float, str]],
+        hike_id: int,
+        descending: bool = False
+    ) -> np.ndarray:
+        """Mask of rows ordered strictly after (key, hike_id) by sort()."""
+        if sort_by in self.sorted_text:
+            if not isinstance(key, str):
+                raise ValueError(f"Cursor key for {sort_by} must be text")
+            # Ranks are whole numbers, so this threshold falls between the
+            # cursor row and its neighbour in the direction of travel
+            find = bisect.bisect_left if descending else bisect.bisect_right
+            key = find(self.sorted_text[sort_by], (key, hike_id)) - 0.5
+        elif isinstance(key, str):
+            raise ValueError(f"Cursor key for {sort_by} must be a number")
+
+        ids = self.columns['id']
+        nulls = np.isnan(keys)
+        if descending:
+            if key is None:
+                return nulls & (ids < hike_id)
+            return nulls | (keys < key) | ((keys == key) & (ids < hike_id))
+        if key is None:
+            return (nulls & (ids > hike_id)) | ~nulls
+        return (keys > key) | ((keys == key) & (ids > hike_id))
+
+    def encode_rows(self, indices: np.ndarray, extra_fields: Dict[str, List[Any]]) -> List[bytes]:
+        """JSON objects for the given rows, with each extra field's per-row
+        values (aligned with indices) appended to the pre-serialized record."""
+        prefixes = [orjson.dumps(name)[:-1] for name in extra_fields]
+        prefixes = [b',' + prefix + b'":' for prefix in prefixes]
+        dumps = orjson.dumps
+        row_json = self.row_json
+
+        encoded = []
+        for position, row in enumerate(indices.tolist()):
+            parts = [row_json[row]]
+            for prefix, values in zip(prefixes, extra_fields.values()):
+                parts.append(prefix)
+                parts.append(dumps(values[position]))
+            parts.append(b'}')
+            encoded.append(b''.join(parts))
+        return encoded
+
+
+def load_catalog(db_path: Path, origin_lat: float, origin_lon: float) -> HikeCatalog:
+    """Map the database's catalog snapshot if it is current, otherwise read
+    the whole database into a HikeCatalog."""
+    # Stat before reading so a concurrent rewrite triggers another reload
+    generation = database_generation(db_path)
+    catalog = load_snapshot(db_path, origin_lat, origin_lon, generation)
+    if catalog is None:
+        catalog = read_catalog(db_path, origin_lat, origin_lon, generation)
+    return catalog
+
+
+def load_snapshot(
+    db_path: Path,
+    origin_lat: float,
+    origin_lon: float,
+    generation: Tuple[int, ...]
+) -> Optional[HikeCatalog]:
+    """Catalog from the database's snapshot, or None if there is none or it
+    does not match the database (logging why)."""
+    path = snapshot_path(db_path)
+    if not path.exists():
+        return None
+    try:
+        snapshot = CatalogSnapshot(path)
+        header = snapshot.header
+        if header.origin != (origin_lat, origin_lon):
+            catalog_log.info("Ignoring catalog snapshot %s: written for another origin", path)
+            return None
+        if header.generation != generation:
+            # The file was copied or written since; still current if every
+            # hike's content hash is unchanged
+            conn = connect_read_only(db_path)
+            try:
+                key = content_key(conn)
+            finally:
+                conn.close()
+            if key == NO_CONTENT_KEY or key != header.content_key:
+                catalog_log.warning("Ignoring catalog snapshot %s: the database has changed since it was written", path)
+                return None
+        snapshot.verify()
+        return HikeCatalog.from_snapshot(snapshot, generation)
+    except (OSError, sqlite3.Error, SnapshotError, KeyError) as e:
+        catalog_log.warning("Ignoring catalog snapshot %s: %s", path, e)
+        return None
+
+
+def read_catalog(db_path: Path, origin_lat: float, origin_lon: float, generation: Tuple[int, ...]) -> HikeCatalog:
+    """Read the whole database into a HikeCatalog."""
+    conn = connect_read_only(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM hike_summaries ORDER BY id")
+        records = [dict(row) for row in cursor.fetchall()]
+        trailhead_names = [record.pop('trailhead_name') for record in records]
+
+        # Season summaries are only for SQL consumers; responses carry the full list
+        for record in records:
+            del record['season_months'], record['season_text']
+
+        cursor.execute(
+            "SELECT hike_id, start_month, end_month, season_text FROM climbing_seasons ORDER BY id"
+        )
+        seasons_data: Dict[int, List[Dict[str, Any]]] = {}
+        for row in cursor.fetchall():
+            seasons_data.setdefault(row['hike_id'], []).append({
+                'start_month': row['start_month'],
+                'end_month': row['end_month'],
+                'season_text': row['season_text']
+            })
+
+        full_text_index = has_full_text_index(conn)
+    finally:
+        conn.close()
+
+    # Missing trailheads (or unparsed 0.0 coordinates) have no distance
+    trailheads = TrailheadPoints(
+        np.array([record['latitude'] or np.nan for record in records], dtype=np.float64),
+        np.array([record['longitude'] or np.nan for record in records], dtype=np.float64)
+    )
+    origin_distances = trailheads.distances_from(origin_lat, origin_lon).tolist()
+
+    for record, distance in zip(records, origin_distances):
+        record['distance_from_denver'] = None if math.isnan(distance) else round(distance, 1)
+        record['climbing_seasons'] = seasons_data.get(record['id'], [])
+
+    return HikeCatalog(records, trailheads, trailhead_names, generation, full_text_index)
+
+
+def write_catalog_snapshot(db_path: Path, origin_lat: float, origin_lon: float) -> Path:
+    """Read the database and write its catalog snapshot beside it."""
+    generation = database_generation(db_path)
+    catalog = read_catalog(db_path, origin_lat, origin_lon, generation)
+    conn = connect_read_only(db_path)
+    try:
+        key = content_key(conn)
+    finally:
+        conn.close()
+
+    header = SnapshotHeader(
+        HAS_FULL_TEXT_INDEX if catalog.has_full_text_index else 0,
+        generation,
+        (origin_lat, origin_lon),
+        key,
+        len(catalog)
+    )
+    path = snapshot_path(db_path)
+    write_snapshot(path, header, catalog.snapshot_sections())
+    return path
+
+
+class CatalogCache:
+    """Holds the current catalog and reloads it when the database file changes."""
+
+    def __init__(self, db_path: Path, origin_lat: float, origin_lon: float):
+        self.db_path = db_path
+        self.origin_lat = origin_lat
+        self.origin_lon = origin_lon
+        self._catalog: Optional[HikeCatalog] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> HikeCatalog:
+        """Return the loaded catalog without checking the database, loading it
+        on first use. Reloads happen in get."""
+        catalog = self._catalog
+        if catalog is None:
+            catalog = self.get()
+        return catalog
+
+    def get(self) -> HikeCatalog:
+        """Return the catalog, reloading it if the database has been rewritten."""
+        catalog = self._catalog
+        generation = database_generation(self.db_path)
+        if catalog is not None and catalog.generation == generation:
+            return catalog
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            catalog = self._catalog
+            if catalog is None or catalog.generation != generation:
+                catalog = load_catalog(self.db_path, self.origin_lat, self.origin_lon)
+                self._catalog = catalog
+        return catalog
+
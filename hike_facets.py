@@ -0,0 +1,87 @@
+"""
+Facet counts over the in-memory hike catalog for filter UIs.
+Every facet value (a difficulty rating, a distance bucket, ...) is stored as
+a packed bitset of the hikes it covers, so counting a filtered set against
+all of them is one AND and popcount over a single 2-D array.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+# Bucket lower bounds; each bucket runs up to the next bound, the last is open-ended
+DISTANCE_BUCKETS = (0, 5, 10, 15, 20)
+ELEVATION_GAIN_BUCKETS = (0, 1000, 2000, 3000, 4000, 5000)
+
+FOURTEENER_ELEVATION = 14000
+
+# Number of set bits in every byte value
+BYTE_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint16)
+
+
+def bucket_facet(values: np.ndarray, bounds: Sequence[float]) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+    """(bucket description, membership mask) for each bucket starting at a bound."""
+    buckets = []
+    for i, low in enumerate(bounds):
+        high = bounds[i + 1] if i + 1 < len(bounds) else None
+        mask = values >= low
+        if high is not None:
+            mask &= values < high
+        buckets.append(({'min': low, 'max': high}, mask))
+    return buckets
+
+
+def value_facet(values: np.ndarray) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+    """(value description, membership mask) for each distinct non-null value."""
+    distinct = np.unique(values[~np.isnan(values)])
+    return [
+        ({'value': int(value) if float(value).is_integer() else float(value)}, values == value)
+        for value in distinct
+    ]
+
+
+class FacetIndex:
+    """Packed bitsets for every value of every catalog-wide facet."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        facets = {
+            'difficulty_rating': value_facet(columns['difficulty_rating']),
+            'class_numeric': value_facet(columns['class_numeric']),
+            'crowd_level_numeric': value_facet(columns['crowd_level_numeric']),
+            'round_trip_miles': bucket_facet(columns['round_trip_miles'], DISTANCE_BUCKETS),
+            'total_elevation_gain': bucket_facet(columns['total_elevation_gain'], ELEVATION_GAIN_BUCKETS),
+            'fourteener': self.flag_facet(columns['highest_peak_elevation'] >= FOURTEENER_ELEVATION)
+        }
+
+        # One row per facet value; descriptions say which facet and value it is
+        self.descriptions: List[Tuple[str, Dict[str, Any]]] = []
+        masks = []
+        for facet, values in facets.items():
+            for description, mask in values:
+                self.descriptions.append((facet, description))
+                masks.append(mask)
+        self.size = len(columns['id'])
+        self.bitsets = np.packbits(np.array(masks, dtype=bool).reshape(len(masks), self.size), axis=1)
+
+    @staticmethod
+    def flag_facet(mask: np.ndarray) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+        """Facet values for a yes/no property."""
+        return [({'value': True}, mask), ({'value': False}, ~mask)]
+
+    def counts(self, mask: np.ndarray, in_season: np.ndarray) -> Dict[str, Any]:
+        """Count the hikes selected by mask under every facet value, plus the
+        per-request in-season facet."""
+        selected = np.packbits(mask)
+        value_counts = BYTE_POPCOUNT[self.bitsets & selected].sum(axis=1)
+
+        facets: Dict[str, List[Dict[str, Any]]] = {}
+        for (facet, description), count in zip(self.descriptions, value_counts.tolist()):
+            facets.setdefault(facet, []).append(dict(description, count=count))
+
+        in_season_count = int(np.count_nonzero(mask & in_season))
+        facets['in_season'] = [
+            {'value': True, 'count': in_season_count},
+            {'value': False, 'count': int(np.count_nonzero(mask)) - in_season_count}
+        ]
+        return facets
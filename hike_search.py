@@ -0,0 +1,67 @@
+"""
+Full-text hike search backed by the hikes_fts FTS5 table.
+Turns search box input into a prefix-matching FTS5 query and returns
+BM25 relevance scores and highlighted snippets.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from query_plans import id_list_sql, padded_ids
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# BM25 weights for name, description, terrain, gear_advisor, location
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0, 1.0, 2.0)
+
+# Markers wrapped around matched terms in snippets
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+# Approximate number of words in each snippet
+SNIPPET_WORDS = 16
+
+# Snippets for a list of hike ids ({ids}, filled in by id_list_sql)
+SNIPPETS_BY_ID = """
+    SELECT rowid, snippet(hikes_fts, -1, ?, ?, '...', ?)
+    FROM hikes_fts
+    WHERE hikes_fts MATCH ? AND rowid IN ({ids})
+"""
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Build an FTS5 query matching every word as a prefix, so partially typed
+    words match while the user is still typing. Returns None if text has no words."""
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def has_full_text_index(conn: sqlite3.Connection) -> bool:
+    """Whether the database has the hikes_fts table."""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hikes_fts'")
+    return cursor.fetchone() is not None
+
+
+def rank_matches(conn: sqlite3.Connection, match_query: str) -> List[Tuple[int, float]]:
+    """(hike id, BM25 score) for every matching hike. Lower scores are more relevant."""
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    cursor = conn.execute(
+        f"SELECT rowid, bm25(hikes_fts, {weights}) FROM hikes_fts WHERE hikes_fts MATCH ?",
+        (match_query,)
+    )
+    return cursor.fetchall()
+
+
+def fetch_snippets(conn: sqlite3.Connection, match_query: str, hike_ids: List[int]) -> Dict[int, str]:
+    """Highlighted snippet of the best-matching column for each of hike_ids."""
+    if not hike_ids:
+        return {}
+    cursor = conn.execute(
+        id_list_sql(SNIPPETS_BY_ID, len(hike_ids)),
+        (HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_WORDS, match_query, *padded_ids(hike_ids))
+    )
+    return dict(cursor.fetchall())
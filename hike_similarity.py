@@ -0,0 +1,146 @@
+"""
+"Similar hikes" search over the in-memory hike catalog.
+Each hike becomes a weighted, standardized feature vector (distance, gain,
+difficulty, class, crowds, summit elevation, trailhead position and climbing
+season months); neighbours are the nearest vectors by Euclidean distance,
+found with one vectorized pass over the matrix and cached per hike.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Numeric columns and the weight of each once standardized
+NUMERIC_FEATURES = {
+    'round_trip_miles': 1.0,
+    'total_elevation_gain': 1.0,
+    'difficulty_rating': 1.0,
+    'class_numeric': 1.0,
+    'crowd_level_numeric': 0.5,
+    'highest_peak_elevation': 1.0,
+}
+
+# Weight of trailhead position (two dimensions sharing one scale, so
+# distance in feature space follows distance on the ground)
+LOCATION_WEIGHT = 1.0
+
+# Weight of the twelve season-month flags together
+SEASON_WEIGHT = 1.0
+
+# Columns of the feature matrix: numeric features, trailhead position and
+# season months
+FEATURE_COUNT = len(NUMERIC_FEATURES) + 2 + 12
+
+# Neighbours kept per cached hike, and hikes kept in the cache
+CACHED_NEIGHBORS = 50
+MAX_CACHED_HIKES = 4096
+
+
+def season_months(seasons: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Twelve flags for the months covered by (start_month, end_month)
+    ranges; ranges may wrap past December."""
+    months = np.zeros(12, dtype=bool)
+    for start_month, end_month in seasons:
+        if start_month is None or end_month is None:
+            continue
+        if start_month <= end_month:
+            months[start_month - 1:end_month] = True
+        else:
+            months[start_month - 1:] = True
+            months[:end_month] = True
+    return months
+
+
+def standardize(values: np.ndarray) -> np.ndarray:
+    """Zero-mean, unit-variance values with missing ones at the mean."""
+    present = values[~np.isnan(values)]
+    if len(present) == 0:
+        return np.zeros_like(values)
+    return np.nan_to_num((values - present.mean()) / (present.std() or 1.0))
+
+
+class SimilarityIndex:
+    """Feature matrix of every catalog hike with a cached k-NN search."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], seasons_per_row: List[List[Tuple[int, int]]]):
+        features = [standardize(columns[name]) * weight for name, weight in NUMERIC_FEATURES.items()]
+
+        # Longitude is shrunk by the cosine of latitude so both axes are in
+        # the same units, then both share one scale
+        latitudes = columns['latitude']
+        location = np.stack([latitudes, columns['longitude'] * np.cos(np.radians(latitudes))], axis=1)
+        present = location[~np.isnan(location).any(axis=1)]
+        if len(present):
+            location = (location - present.mean(axis=0)) / (present.std() or 1.0)
+        location = np.nan_to_num(location) * LOCATION_WEIGHT
+
+        # Each month flag is scaled so the whole season block weighs SEASON_WEIGHT
+        months = np.array([season_months(seasons) for seasons in seasons_per_row], dtype=np.float64).reshape(-1, 12)
+        months *= SEASON_WEIGHT / np.sqrt(12)
+
+        self._set_matrix(np.column_stack(features + [location, months]).astype(np.float32))
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> 'SimilarityIndex':
+        """Index over another index's feature matrix, flattened or not."""
+        index = cls.__new__(cls)
+        index._set_matrix(matrix.reshape(-1, FEATURE_COUNT))
+        return index
+
+    def _set_matrix(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def distances(self, row: int) -> np.ndarray:
+        """Feature-space distance from row to every hike."""
+        squared = self.norms - 2 * (self.matrix @ self.matrix[row]) + self.norms[row]
+        return np.sqrt(np.maximum(squared, 0))
+
+    def nearest(self, row: int, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of the k hikes nearest to row (excluding it) among those
+        selected by mask, nearest first, with their distances."""
+        cached_rows, cached_distances = self._cached_neighbors(row)
+        rows, distances = cached_rows, cached_distances
+        if mask is not None:
+            keep = mask[rows]
+            rows, distances = rows[keep], distances[keep]
+
+        # Any selected hike nearer than the k-th cached one would itself be
+        # cached, so the cache answers whenever it holds k selected hikes
+        # (or holds every hike)
+        if len(rows) >= k or len(cached_rows) == len(self.matrix) - 1:
+            return rows[:k], distances[:k]
+        return self._search(row, k, mask)
+
+    def _cached_neighbors(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Unfiltered nearest neighbours of row, computed on first use."""
+        with self._lock:
+            cached = self._cache.get(row)
+            if cached is not None:
+                self._cache.move_to_end(row)
+                return cached
+
+        cached = self._search(row, CACHED_NEIGHBORS)
+        with self._lock:
+            self._cache[row] = cached
+            while len(self._cache) > MAX_CACHED_HIKES:
+                self._cache.popitem(last=False)
+        return cached
+
+    def _search(self, row: int, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact k nearest neighbours by a full scan."""
+        distances = self.distances(row)
+        distances[row] = np.inf
+        if mask is not None:
+            distances[~mask] = np.inf
+        candidates = np.count_nonzero(np.isfinite(distances))
+        k = min(k, candidates)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.lexsort((nearest, distances[nearest]))]
+        return nearest, distances[nearest]
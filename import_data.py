@@ -1,38 +1,240 @@
 #!/usr/bin/env python3
 """
 Import summit hikes data from JSON into SQLite database.
+Hikes are streamed from a JSON array or NDJSON file, parsed into row tuples
+and loaded in fixed-size batches with one executemany per table; indexes and
+full-text triggers are created after the load so they are built once rather
+than maintained per row. Parsing can be spread over worker processes while
+a single connection writes. Each committed batch is recorded so an
+interrupted import can be resumed. Re-importing into an existing database
+applies only the hikes whose content hash changed. Either way a catalog
+snapshot is then written beside the database for the API to map at startup.
 """
 
+import argparse
+import hashlib
 import json
 import sqlite3
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Optional
+
+from geo import DENVER_LAT, DENVER_LON
+from hike_catalog import write_catalog_snapshot
+
+
+DIFFICULTY_PATTERN = re.compile(r'(\d+(?:\.\d+)?)/10')
+DISTANCE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*miles')
+HOURS_RANGE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)\s*hours')
+DAYS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*days?')
+HOURS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*hours?')
+ELEVATION_PATTERN = re.compile(r'(\d{1,2},?\d{3})')
+GPS_COORDINATE_PATTERN = re.compile(r"(\d+)°(\d+(?:\.\d+)?)'?\s*([NSEW])")
+PEAK_ELEVATIONS_PATTERN = re.compile(r'([^:;]+):\s*(\d{1,2},?\d{3})')
+TRAILHEAD_NAME_PATTERN = re.compile(r'\(([^)]+)\)')
+
+CLASS_VALUES = {
+    '1': 1.0,
+    '1; 2 for the last 0.5 mile': 1.5,
+    '2': 2.0,
+    '2 with long class 1 sections': 2.0,
+    '2+': 2.3,
+    '2+/3': 2.5,
+    '2+; optional class 3 moves on summit': 2.3,
+    '2/2+': 2.2,
+    '3': 3.0,
+    '3 with significant exposure': 3.0,
+    '3/3+': 3.3,
+    '3; class 2 hike in': 3.0
+}
+
+# Month names and abbreviations found in season text
+MONTH_NUMBERS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
+    'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# Hikes parsed and committed per transaction
+DEFAULT_BATCH_SIZE = 1000
+
+# Batches queued or being parsed per worker process; bounds memory when
+# parsing outpaces the writer
+PENDING_BATCHES_PER_WORKER = 2
+
+# Characters read from the source file at a time
+READ_CHUNK_SIZE = 1 << 16
+
+# Mixed into every content hash; bump when parsing changes so the next
+# delta import rewrites every hike
+PARSER_VERSION = 1
+
+# Schema statements run after the data is loaded
+DEFERRED_STATEMENT_PREFIXES = ('CREATE INDEX', 'CREATE TRIGGER', 'DROP INDEX')
+
+INSERT_HIKE = '''
+    INSERT INTO hikes (
+        id, number, name, description, round_trip_miles,
+        hiking_time_min, hiking_time_max, difficulty_rating,
+        difficulty_label, class_numeric, class_text,
+        start_elevation, total_elevation_gain, terrain,
+        crowd_level_numeric, crowd_level_text, is_overnight,
+        gear_advisor, location
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_PEAK = '''
+    INSERT INTO peaks (hike_id, peak_name, elevation, is_primary)
+    VALUES (?, ?, ?, ?)
+'''
+INSERT_TRAILHEAD = '''
+    INSERT INTO trailheads (hike_id, name, latitude, longitude, elevation)
+    VALUES (?, ?, ?, ?, ?)
+'''
+INSERT_SEASON = '''
+    INSERT INTO climbing_seasons (hike_id, start_month, end_month, season_text)
+    VALUES (?, ?, ?, ?)
+'''
+INSERT_HASH = '''
+    INSERT OR REPLACE INTO hike_hashes (number, content_hash)
+    VALUES (?, ?)
+'''
+
+# Tables holding rows for a hike, keyed by the column storing its id
+HIKE_TABLES = (
+    ('peaks', 'hike_id'),
+    ('trailheads', 'hike_id'),
+    ('climbing_seasons', 'hike_id'),
+    ('hike_hashes', 'number'),
+    ('hikes', 'id')
+)
+
+
+class ImportProgress(NamedTuple):
+    """Position of an interrupted import in its source file."""
+    source: str
+    hikes_committed: int
+    last_number: int
+
+
+class ParsedHike(NamedTuple):
+    """Rows to insert for one source hike."""
+    hike: tuple
+    peaks: List[tuple]
+    trailheads: List[tuple]
+    seasons: List[tuple]
+    content_hash: str
+
+
+def iter_json_array(f, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict]:
+    """Yield the elements of a top-level JSON array one at a time, reading the
+    file in chunks so only the current element is held in memory. Raises
+    ValueError on a missing, doubled or trailing comma."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    consumed = 0
+    at_end = False
+    # Next token allowed: '[' to open, the first element or ']', a ',' or ']'
+    # after an element, or an element after a ','
+    expecting = 'open'
+    # Characters an element that failed to decode must span before it is
+    # decoded again, so one larger than a chunk is not re-parsed per chunk
+    wanted = 0
+    
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n':
+            position += 1
+        
+        if position < len(buffer) and (at_end or len(buffer) - position >= wanted):
+            char = buffer[position]
+            if expecting == 'open':
+                if char != '[':
+                    raise ValueError("Expected a JSON array of hikes")
+                expecting = 'first'
+                position += 1
+                continue
+            if expecting == 'separator':
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' at offset {consumed + position}")
+                expecting = 'element'
+                position += 1
+                continue
+            if char == ']' and expecting == 'first':
+                return
+            if char in ',]':
+                raise ValueError(f"Expected an array element at offset {consumed + position}")
+            
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+                wanted = 2 * (len(buffer) - position)
+            else:
+                # An element running to the end of the buffer may continue
+                # in the next chunk (a number, say), so decode it again then
+                if end < len(buffer) or at_end:
+                    yield element
+                    position = end
+                    expecting = 'separator'
+                    wanted = 0
+                    continue
+                wanted = len(buffer) - position + 1
+        elif at_end:
+            raise ValueError("Unexpected end of JSON array")
+        
+        # Need more input: drop what has been consumed and read at least the
+        # rest of what a pending element needs
+        chunk = f.read(max(chunk_size, wanted - (len(buffer) - position)))
+        at_end = not chunk
+        consumed += position
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_ndjson(f) -> Iterator[Dict]:
+    """Yield one hike per non-blank line of newline-delimited JSON."""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_hikes(f) -> Iterator[Dict]:
+    """Yield hikes from a JSON array or NDJSON file, detected from its first
+    non-whitespace character."""
+    first = ''
+    while not first:
+        chunk = f.read(1)
+        if not chunk:
+            return
+        first = chunk.strip()
+    f.seek(0)
+    
+    if first == '[':
+        yield from iter_json_array(f)
+    else:
+        yield from iter_ndjson(f)
 
 
 def parse_difficulty(difficulty_str: str) -> float:
     """Extract numeric difficulty from 'X/10' format."""
-    match = re.search(r'(\d+(?:\.\d+)?)/10', difficulty_str)
+    match = DIFFICULTY_PATTERN.search(difficulty_str)
     return float(match.group(1)) if match else 0.0
 
 
 def parse_class(class_str: str) -> float:
     """Map class descriptions to numeric values."""
-    class_mappings = {
-        '1': 1.0,
-        '1; 2 for the last 0.5 mile': 1.5,
-        '2': 2.0,
-        '2 with long class 1 sections': 2.0,
-        '2+': 2.3,
-        '2+/3': 2.5,
-        '2+; optional class 3 moves on summit': 2.3,
-        '2/2+': 2.2,
-        '3': 3.0,
-        '3 with significant exposure': 3.0,
-        '3/3+': 3.3,
-        '3; class 2 hike in': 3.0
-    }
-    return class_mappings.get(class_str, 2.0)
+    return CLASS_VALUES.get(class_str, 2.0)
 
 
 def parse_crowd_level(crowd_str: str) -> Tuple[int, str]:
@@ -55,19 +257,19 @@ def parse_crowd_level(crowd_str: str) -> Tuple[int, str]:
 
 def parse_distance(distance_str: str) -> float:
     """Extract miles from distance string."""
-    match = re.search(r'(\d+(?:\.\d+)?)\s*miles', distance_str)
+    match = DISTANCE_PATTERN.search(distance_str)
     return float(match.group(1)) if match else 0.0
 
 
 def parse_hiking_time(time_str: str) -> Tuple[float, float]:
     """Parse hiking time range into min and max hours."""
     # Handle "X-Y hours" format first
-    match = re.search(r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)\s*hours', time_str)
+    match = HOURS_RANGE_PATTERN.search(time_str)
     if match:
         return float(match.group(1)), float(match.group(2))
     
     # Handle "X days" format - convert to hours
-    days_match = re.search(r'(\d+(?:\.\d+)?)\s*days?', time_str)
+    days_match = DAYS_PATTERN.search(time_str)
     if days_match:
         days = float(days_match.group(1))
         # Assume 8-12 hours of hiking per day for multi-day hikes
@@ -76,7 +278,7 @@ def parse_hiking_time(time_str: str) -> Tuple[float, float]:
         return min_hours, max_hours
     
     # Handle single hour values like "4 hours"
-    single_match = re.search(r'(\d+(?:\.\d+)?)\s*hours?', time_str)
+    single_match = HOURS_PATTERN.search(time_str)
     if single_match:
         hours = float(single_match.group(1))
         return hours, hours
@@ -86,13 +288,13 @@ def parse_hiking_time(time_str: str) -> Tuple[float, float]:
 
 def parse_elevation(elevation_str: str) -> int:
     """Extract elevation number from string."""
-    match = re.search(r'(\d{1,2},?\d{3})', elevation_str.replace(',', ''))
+    match = ELEVATION_PATTERN.search(elevation_str.replace(',', ''))
     return int(match.group(1)) if match else 0
 
 
 def parse_gps_coordinate(coord_str: str) -> float:
     """Convert GPS coordinate from degrees/minutes to decimal."""
-    match = re.search(r"(\d+)°(\d+(?:\.\d+)?)'?\s*([NSEW])", coord_str)
+    match = GPS_COORDINATE_PATTERN.search(coord_str)
     if match:
         degrees = float(match.group(1))
         minutes = float(match.group(2))
@@ -119,15 +321,6 @@ def parse_gps(gps_str: str) -> Tuple[float, float]:
 
 def parse_climbing_season(season_str: str) -> List[Tuple[int, int]]:
     """Parse climbing season text into month ranges."""
-    month_map = {
-        'january': 1, 'february': 2, 'march': 3, 'april': 4,
-        'may': 5, 'june': 6, 'july': 7, 'august': 8,
-        'september': 9, 'october': 10, 'november': 11, 'december': 12,
-        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
-        'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-        'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-    }
-    
     if 'year-round' in season_str.lower():
         return [(1, 12)]
     
@@ -136,12 +329,11 @@ def parse_climbing_season(season_str: str) -> List[Tuple[int, int]]:
     
     # Look for month ranges with dash/hyphen
     # Pattern: "Month-Month" or "Late/Early/Mid Month-Month"
-    import re
     
     # Find all month names in order they appear
     month_positions = []
     found_nums = set()
-    for month, num in month_map.items():
+    for month, num in MONTH_NUMBERS.items():
         pos = season_lower.find(month)
         if pos != -1 and num not in found_nums:
             month_positions.append((pos, month, num))
@@ -179,98 +371,401 @@ def parse_peaks(hike: Dict) -> List[Tuple[Optional[str], int]]:
         # Multiple peaks
         peak_text = hike['peak_elevations']
         # Parse entries like "Green Mountain: 8,144'; Bear Peak: 8,461'"
-        peak_matches = re.findall(r'([^:;]+):\s*(\d{1,2},?\d{3})', peak_text)
+        peak_matches = PEAK_ELEVATIONS_PATTERN.findall(peak_text)
         for name, elev in peak_matches:
             peaks.append((name.strip(), parse_elevation(elev)))
     
     return peaks
 
 
-def import_hikes(json_path: Path, db_path: Path):
-    """Import hikes from JSON file into SQLite database."""
-    # Load JSON data
-    with open(json_path, 'r') as f:
-        hikes_data = json.load(f)
+def rebuild_hike_summaries(cursor: sqlite3.Cursor):
+    """Materialize hike_summaries from hikes, peaks, trailheads and seasons."""
+    cursor.execute('DELETE FROM hike_summaries')
+    cursor.execute("""
+        INSERT INTO hike_summaries
+        SELECT
+            h.*,
+            p.all_peaks,
+            p.highest_peak_elevation,
+            COALESCE(p.peak_count, 0),
+            t.latitude,
+            t.longitude,
+            t.name,
+            s.season_months,
+            s.season_text
+        FROM hikes h
+        LEFT JOIN (
+            SELECT
+                hike_id,
+                GROUP_CONCAT(peak_name || ' (' || elevation || ''')', ', ') as all_peaks,
+                MAX(elevation) as highest_peak_elevation,
+                COUNT(id) as peak_count
+            FROM peaks
+            GROUP BY hike_id
+        ) p ON p.hike_id = h.id
+        LEFT JOIN trailheads t ON t.id = (
+            SELECT MIN(id) FROM trailheads WHERE hike_id = h.id
+        )
+        LEFT JOIN (
+            SELECT
+                hike_id,
+                GROUP_CONCAT(start_month || '-' || end_month, ', ') as season_months,
+                MIN(season_text) as season_text
+            FROM climbing_seasons
+            GROUP BY hike_id
+        ) s ON s.hike_id = h.id
+    """)
+
+
+def hash_hike(hike: Dict) -> str:
+    """Content hash of a source hike, independent of key order."""
+    content = json.dumps([PARSER_VERSION, hike], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def parse_hike(hike: Dict) -> ParsedHike:
+    """Parse one source hike into rows for hikes, peaks, trailheads and seasons."""
+    hike_id = hike['number']
+    crowd_num, crowd_text = parse_crowd_level(hike['crowd_level'])
+    time_min, time_max = parse_hiking_time(hike['hiking_time'])
+    start_elev = parse_elevation(hike['start_elevation'])
+    
+    hike_row = (
+        hike_id, hike['number'], hike['name'], hike['description'],
+        parse_distance(hike['round_trip_distance']), time_min, time_max,
+        parse_difficulty(hike['difficulty']), hike['difficulty'],
+        parse_class(hike['class']), hike['class'], start_elev,
+        parse_elevation(hike['total_elevation_gain']), hike['terrain'],
+        crowd_num, crowd_text, hike.get('label') == 'GOOD OVERNIGHT',
+        hike.get('gear_advisor'), hike.get('location')
+    )
+    
+    peak_rows = [
+        (hike_id, peak_name, elevation, i == 0)
+        for i, (peak_name, elevation) in enumerate(parse_peaks(hike))
+    ]
+    
+    trailhead_rows = []
+    if 'trailhead_gps' in hike:
+        lat, lon = parse_gps(hike['trailhead_gps'])
+        trailhead_name = TRAILHEAD_NAME_PATTERN.search(hike['start_elevation'])
+        trailhead_name = trailhead_name.group(1) if trailhead_name else 'Main Trailhead'
+        trailhead_rows.append((hike_id, trailhead_name, lat, lon, start_elev))
+    
+    season_text = hike.get('best_time_to_climb', '')
+    season_rows = [
+        (hike_id, start_month, end_month, season_text)
+        for start_month, end_month in parse_climbing_season(season_text)
+    ]
+    
+    # Bonus peaks would need custom parsing based on their format
+    return ParsedHike(hike_row, peak_rows, trailhead_rows, season_rows, hash_hike(hike))
+
+
+def parse_batch(hikes: List[Dict]) -> List[ParsedHike]:
+    """Parse a batch of source hikes."""
+    return [parse_hike(hike) for hike in hikes]
+
+
+def parse_batches(hikes: Iterator[Dict], batch_size: int, workers: int = 1) -> Iterator[List[ParsedHike]]:
+    """Yield parsed batches of up to batch_size hikes in source order, parsing
+    in worker processes when workers is more than one."""
+    batches = iter(lambda: list(islice(hikes, batch_size)), [])
+    if workers <= 1:
+        yield from map(parse_batch, batches)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(parse_batch, batch))
+            if len(pending) >= workers * PENDING_BATCHES_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def split_schema(schema_sql: str) -> Tuple[List[str], List[str]]:
+    """Split the schema into statements to run before loading data and
+    index/trigger statements to defer until after the load (these are
+    also run on every update, so existing databases pick them up)."""
+    immediate, deferred = [], []
+    statement = ''
+    for line in schema_sql.splitlines(keepends=True):
+        statement += line
+        if not sqlite3.complete_statement(statement):
+            continue
+        
+        text = statement.strip()
+        # Drop leading comment lines so the statement keyword is first
+        while text.startswith('--'):
+            text = text.split('\n', 1)[1].strip() if '\n' in text else ''
+        if text:
+            (deferred if text.upper().startswith(DEFERRED_STATEMENT_PREFIXES) else immediate).append(text)
+        statement = ''
+    return immediate, deferred
+
+
+def insert_hikes(cursor: sqlite3.Cursor, parsed_hikes: List[ParsedHike]) -> int:
+    """Insert parsed hikes with one executemany per table. Returns rows written."""
+    hike_rows = [parsed.hike for parsed in parsed_hikes]
+    peak_rows = [row for parsed in parsed_hikes for row in parsed.peaks]
+    trailhead_rows = [row for parsed in parsed_hikes for row in parsed.trailheads]
+    season_rows = [row for parsed in parsed_hikes for row in parsed.seasons]
+    
+    cursor.executemany(INSERT_HIKE, hike_rows)
+    cursor.executemany(INSERT_PEAK, peak_rows)
+    cursor.executemany(INSERT_TRAILHEAD, trailhead_rows)
+    cursor.executemany(INSERT_SEASON, season_rows)
+    cursor.executemany(INSERT_HASH, [(parsed.hike[1], parsed.content_hash) for parsed in parsed_hikes])
+    return len(hike_rows) + len(peak_rows) + len(trailhead_rows) + len(season_rows)
+
+
+@contextmanager
+def transaction(cursor: sqlite3.Cursor) -> Iterator[sqlite3.Cursor]:
+    """Run a with block in one transaction, rolling back if it raises."""
+    cursor.execute('BEGIN')
+    try:
+        yield cursor
+    except BaseException:
+        cursor.execute('ROLLBACK')
+        raise
+    cursor.execute('COMMIT')
+
+
+def read_progress(cursor: sqlite3.Cursor) -> Optional[ImportProgress]:
+    """Progress of an interrupted import, or None if there is none."""
+    try:
+        row = cursor.execute(
+            'SELECT source, hikes_committed, last_number FROM import_progress'
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return ImportProgress(*row) if row else None
+
+
+def skip_committed(hikes: Iterator[Dict], progress: ImportProgress):
+    """Advance past the hikes an interrupted import already committed,
+    checking the source still lines up with what was loaded."""
+    last = None
+    for last in islice(hikes, progress.hikes_committed):
+        pass
+    if progress.hikes_committed and (last is None or last['number'] != progress.last_number):
+        raise ValueError(
+            f"Source does not match the interrupted import: expected hike {progress.last_number} "
+            f"at position {progress.hikes_committed}"
+        )
+
+
+def delete_hikes(cursor: sqlite3.Cursor, hike_ids: List[int]):
+    """Delete hikes and their peaks, trailheads, seasons and content hashes.
+    The hikes_fts delete trigger removes them from the full-text index."""
+    for start in range(0, len(hike_ids), DEFAULT_BATCH_SIZE):
+        chunk = hike_ids[start:start + DEFAULT_BATCH_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        for table, id_column in HIKE_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE {id_column} IN ({placeholders})', chunk)
+
+
+def has_table(cursor: sqlite3.Cursor, name: str) -> bool:
+    """Whether the database has a table called name."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def full_text_index_populated(cursor: sqlite3.Cursor) -> bool:
+    """Whether hikes_fts exists and has indexed rows (or there are no hikes).
+    Its row count reads the hikes content table, so the index's own
+    per-document sizes are counted instead."""
+    if not has_table(cursor, 'hikes_fts'):
+        return False
+    has_hikes = cursor.execute('SELECT EXISTS (SELECT 1 FROM hikes)').fetchone()[0]
+    has_documents = cursor.execute('SELECT EXISTS (SELECT 1 FROM hikes_fts_docsize)').fetchone()[0]
+    return has_documents or not has_hikes
+
+
+def import_hikes(
+    json_path: Path,
+    db_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = False,
+    workers: int = 1
+):
+    """Import hikes from a JSON array or NDJSON file into SQLite database."""
+    started = time.perf_counter()
     
-    # Connect to database
-    conn = sqlite3.connect(db_path)
+    # Connect to database; transactions are managed explicitly below
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
     
-    # Create tables
+    # WAL lets the API's read-only connections keep reading during writes;
+    # fsyncs are skipped during the load since a failed import is resumed
+    # or rerun
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=OFF')
+    
     schema_path = Path(__file__).parent / 'database_schema.sql'
     with open(schema_path, 'r') as f:
-        cursor.executescript(f.read())
+        schema_statements, deferred_statements = split_schema(f.read())
     
-    # Import each hike
-    for hike in hikes_data:
-        # Parse fields
-        difficulty_num = parse_difficulty(hike['difficulty'])
-        class_num = parse_class(hike['class'])
-        crowd_num, crowd_text = parse_crowd_level(hike['crowd_level'])
-        distance = parse_distance(hike['round_trip_distance'])
-        time_min, time_max = parse_hiking_time(hike['hiking_time'])
-        start_elev = parse_elevation(hike['start_elevation'])
-        gain = parse_elevation(hike['total_elevation_gain'])
-        is_overnight = hike.get('label') == 'GOOD OVERNIGHT'
-        
-        # Insert hike
-        cursor.execute('''
-            INSERT INTO hikes (
-                id, number, name, description, round_trip_miles,
-                hiking_time_min, hiking_time_max, difficulty_rating,
-                difficulty_label, class_numeric, class_text,
-                start_elevation, total_elevation_gain, terrain,
-                crowd_level_numeric, crowd_level_text, is_overnight,
-                gear_advisor, location
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            hike['number'], hike['number'], hike['name'], hike['description'],
-            distance, time_min, time_max, difficulty_num, hike['difficulty'],
-            class_num, hike['class'], start_elev, gain, hike['terrain'],
-            crowd_num, crowd_text, is_overnight, hike.get('gear_advisor'),
-            hike.get('location')
-        ))
-        
-        hike_id = hike['number']
-        
-        # Insert peaks
-        peaks = parse_peaks(hike)
-        for i, (peak_name, elevation) in enumerate(peaks):
-            cursor.execute('''
-                INSERT INTO peaks (hike_id, peak_name, elevation, is_primary)
-                VALUES (?, ?, ?, ?)
-            ''', (hike_id, peak_name, elevation, i == 0))
+    try:
+        source = json_path.name
+        if resume:
+            progress = read_progress(cursor)
+            if progress is None:
+                raise ValueError(f"No interrupted import to resume in {db_path}")
+            if progress.source != source:
+                raise ValueError(f"Interrupted import was loading {progress.source}, not {source}")
+        else:
+            # Create tables; rows are loaded before any index or trigger
+            # exists. Progress is recorded from the start, so a load that
+            # fails before its first batch is resumed rather than updated
+            progress = ImportProgress(source, 0, 0)
+            with transaction(cursor):
+                for statement in schema_statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    'INSERT INTO import_progress (id, source, hikes_committed, last_number) VALUES (1, ?, ?, ?)',
+                    progress
+                )
         
-        # Insert trailhead
-        if 'trailhead_gps' in hike:
-            lat, lon = parse_gps(hike['trailhead_gps'])
-            trailhead_name = re.search(r'\(([^)]+)\)', hike['start_elevation'])
-            trailhead_name = trailhead_name.group(1) if trailhead_name else 'Main Trailhead'
+        hikes_imported = rows_written = 0
+        with open(json_path, 'r') as f:
+            hikes = iter_hikes(f)
+            skip_committed(hikes, progress)
             
-            cursor.execute('''
-                INSERT INTO trailheads (hike_id, name, latitude, longitude, elevation)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (hike_id, trailhead_name, lat, lon, start_elev))
+            # Commit a batch at a time, recording how far the load got so
+            # it can be resumed from the next batch
+            for batch in parse_batches(hikes, batch_size, workers):
+                progress = ImportProgress(
+                    source, progress.hikes_committed + len(batch), batch[-1].hike[1]
+                )
+                with transaction(cursor):
+                    rows_written += insert_hikes(cursor, batch)
+                    cursor.execute(
+                        'INSERT OR REPLACE INTO import_progress (id, source, hikes_committed, last_number) '
+                        'VALUES (1, ?, ?, ?)',
+                        progress
+                    )
+                hikes_imported += len(batch)
         
-        # Insert climbing seasons
-        season_text = hike.get('best_time_to_climb', '')
-        seasons = parse_climbing_season(season_text)
-        for start_month, end_month in seasons:
-            cursor.execute('''
-                INSERT INTO climbing_seasons (hike_id, start_month, end_month, season_text)
-                VALUES (?, ?, ?, ?)
-            ''', (hike_id, start_month, end_month, season_text))
+        # Build the indexes (which the summary query's trailhead lookup
+        # needs) and the triggers that keep hikes_fts in sync from now on,
+        # then index the full-text table in one pass
+        with transaction(cursor):
+            for statement in deferred_statements:
+                cursor.execute(statement)
+            cursor.execute("INSERT INTO hikes_fts (hikes_fts) VALUES ('rebuild')")
+            rebuild_hike_summaries(cursor)
+            cursor.execute('DELETE FROM import_progress')
+    finally:
+        conn.close()
+    
+    elapsed = time.perf_counter() - started
+    print(f"Successfully imported {hikes_imported} hikes into {db_path}")
+    print(f"Wrote {rows_written} rows in {elapsed:.2f}s ({rows_written / elapsed:,.0f} rows/sec)")
+    print(f"Wrote catalog snapshot {write_catalog_snapshot(db_path, DENVER_LAT, DENVER_LON)}")
+
+
+def update_hikes(
+    json_path: Path,
+    db_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1
+):
+    """Bring an existing database in line with a source file in one transaction,
+    rewriting only hikes that are new or whose content hash changed and
+    deleting hikes missing from the source."""
+    started = time.perf_counter()
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
+    schema_path = Path(__file__).parent / 'database_schema.sql'
+    with open(schema_path, 'r') as f:
+        schema_statements, deferred_statements = split_schema(f.read())
+    fts_statements = [
+        statement for statement in schema_statements
+        if statement.upper().startswith('CREATE VIRTUAL TABLE IF NOT EXISTS HIKES_FTS')
+    ]
+    
+    try:
+        if not has_table(cursor, 'hike_hashes'):
+            raise ValueError(f"{db_path} predates content hashes; delete it and run a full import")
+        if read_progress(cursor) is not None:
+            raise ValueError(f"{db_path} has an interrupted import; finish it with --resume")
+        stored_hashes = dict(cursor.execute('SELECT number, content_hash FROM hike_hashes'))
         
-        # Handle bonus peaks if present
-        if 'bonus_peaks' in hike:
-            # This would need custom parsing based on the format
-            pass
+        inserted = updated = unchanged = 0
+        seen = set()
+        with transaction(cursor):
+            # Add any full-text table, index or trigger the database lacks
+            # (these statements are all IF NOT EXISTS). A full-text index
+            # that is missing or empty is rebuilt once the hikes are updated
+            rebuild_fts = not full_text_index_populated(cursor)
+            for statement in fts_statements + deferred_statements:
+                cursor.execute(statement)
+            
+            with open(json_path, 'r') as f:
+                for batch in parse_batches(iter_hikes(f), batch_size, workers):
+                    changed = []
+                    for parsed in batch:
+                        number = parsed.hike[1]
+                        seen.add(number)
+                        stored_hash = stored_hashes.get(number)
+                        if stored_hash == parsed.content_hash:
+                            unchanged += 1
+                            continue
+                        if stored_hash is None:
+                            inserted += 1
+                        else:
+                            updated += 1
+                        changed.append(parsed)
+                    
+                    # Changed hikes are replaced wholesale; the hikes_fts
+                    # triggers keep the full-text index in step
+                    delete_hikes(cursor, [parsed.hike[0] for parsed in changed])
+                    insert_hikes(cursor, changed)
+            
+            removed = [number for number in stored_hashes if number not in seen]
+            delete_hikes(cursor, removed)
+            
+            if inserted or updated or removed:
+                rebuild_hike_summaries(cursor)
+            if rebuild_fts:
+                cursor.execute("INSERT INTO hikes_fts (hikes_fts) VALUES ('rebuild')")
+    finally:
+        conn.close()
     
-    conn.commit()
-    conn.close()
-    print(f"Successfully imported {len(hikes_data)} hikes into {db_path}")
+    elapsed = time.perf_counter() - started
+    print(
+        f"Updated {db_path} in {elapsed:.2f}s: {inserted} inserted, {updated} updated, "
+        f"{len(removed)} deleted, {unchanged} unchanged"
+    )
+    print(f"Wrote catalog snapshot {write_catalog_snapshot(db_path, DENVER_LAT, DENVER_LON)}")
 
 
-if __name__ == '__main__':
+def main():
     script_dir = Path(__file__).parent
-    import_hikes(script_dir / 'hikes.json', script_dir / 'summit_hikes.db')
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Import summit hikes from JSON or NDJSON into SQLite.")
+    parser.add_argument('--json', type=Path, default=script_dir / 'hikes.json', help="source hikes file (JSON array or NDJSON)")
+    parser.add_argument('--db', type=Path, default=script_dir / 'summit_hikes.db', help="SQLite database to create or update")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="hikes committed per transaction")
+    parser.add_argument('--resume', action='store_true', help="continue an interrupted import into --db")
+    parser.add_argument('--workers', type=int, default=1, help="processes parsing hikes in parallel")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    # An existing database is updated in place with only the hikes that changed
+    if args.db.exists() and not args.resume:
+        update_hikes(args.json, args.db, args.batch_size, args.workers)
+    else:
+        import_hikes(args.json, args.db, args.batch_size, args.resume, args.workers)
+
+
+if __name__ == '__main__':
+    main()
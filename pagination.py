@@ -0,0 +1,45 @@
+"""
+Opaque keyset pagination cursors for the /hikes endpoint.
+A cursor records the sort order and the sort key and id of the last row
+on a page, so the next page starts right after it at any depth.
+"""
+
+import base64
+import binascii
+import json
+from typing import NamedTuple, Optional, Union
+
+
+class Cursor(NamedTuple):
+    """Position just after a row in a given ordering."""
+    sort_by: str
+    sort_order: str
+    key: Optional[Union[float, str]]
+    hike_id: int
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """URL-safe token for a cursor."""
+    payload = json.dumps(
+        [cursor.sort_by, cursor.sort_order, cursor.key, cursor.hike_id],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a token from encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_by, sort_order, key, hike_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, TypeError, ValueError):
+        raise ValueError("Malformed cursor")
+
+    if (
+        not isinstance(sort_by, str)
+        or not isinstance(sort_order, str)
+        or not isinstance(hike_id, int)
+        or not (key is None or isinstance(key, (int, float, str)))
+    ):
+        raise ValueError("Malformed cursor")
+    return Cursor(sort_by, sort_order, key, hike_id)
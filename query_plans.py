@@ -0,0 +1,89 @@
+"""
+SQL statement planning for the summit hikes API.
+Statements that look up a list of ids are generated once per id-count
+bucket and memoized, with the list padded with NULLs up to the bucket size,
+so each connection's prepared statement cache holds a handful of statements
+instead of one per list length. In diagnostic mode every distinct statement
+is run through EXPLAIN QUERY PLAN once and logged, with full table scans and
+temporary B-tree sorts flagged.
+"""
+
+import functools
+import logging
+import sqlite3
+import threading
+from typing import Iterable, List, Sequence
+
+query_plan_log = logging.getLogger('summit_hikes.query_plans')
+
+# Plan steps worth a warning: reading a whole table, or sorting/grouping
+# rows in a temporary B-tree instead of reading them in index order
+FULL_SCAN_PREFIX = 'SCAN '
+TEMP_BTREE_MARKER = 'USE TEMP B-TREE'
+
+
+def padded_size(count: int) -> int:
+    """Smallest power of two holding count ids (at least 1)."""
+    return 1 << max(count - 1, 0).bit_length()
+
+
+def padded_ids(ids: Sequence) -> List:
+    """ids followed by NULLs up to padded_size; NULL never matches IN."""
+    return list(ids) + [None] * (padded_size(len(ids)) - len(ids))
+
+
+@functools.lru_cache(maxsize=None)
+def id_list_sql(template: str, count: int) -> str:
+    """template with {ids} replaced by placeholders for count padded ids."""
+    return template.replace('{ids}', ','.join('?' * padded_size(count)))
+
+
+def plan_problems(details: Iterable[str], full_scan_expected: bool = False) -> List[str]:
+    """Plan steps that scan a whole table or sort in a temporary B-tree.
+    Scans of virtual tables (full-text search) are not flagged."""
+    problems = []
+    for detail in details:
+        if detail.startswith(FULL_SCAN_PREFIX) and 'VIRTUAL TABLE' not in detail and not full_scan_expected:
+            problems.append(detail)
+        elif TEMP_BTREE_MARKER in detail:
+            problems.append(detail)
+    return problems
+
+
+class QueryPlanner:
+    """Runs statements, first explaining each distinct one when explain is on."""
+
+    def __init__(self, explain: bool = False):
+        self.explain = explain
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def execute(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Sequence = (),
+        full_scan_expected: bool = False
+    ) -> sqlite3.Cursor:
+        """conn.execute(sql, params), logging the plan of new statements
+        in diagnostic mode. full_scan_expected marks statements that read
+        a whole table on purpose (such as aggregates)."""
+        if self.explain:
+            with self._lock:
+                is_new = sql not in self._explained
+                self._explained.add(sql)
+            if is_new:
+                self.log_plan(conn, sql, params, full_scan_expected)
+        return conn.execute(sql, params)
+
+    def log_plan(self, conn: sqlite3.Connection, sql: str, params: Sequence, full_scan_expected: bool = False):
+        """Log the EXPLAIN QUERY PLAN of a statement, as a warning if it
+        scans or sorts in a way an index could avoid."""
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+        problems = plan_problems(details, full_scan_expected)
+        lines = [' '.join(sql.split())] + [f"  {detail}" for detail in details]
+        if problems:
+            lines += [f"  flagged: {problem}" for problem in problems]
+            query_plan_log.warning('\n'.join(lines))
+        else:
+            query_plan_log.info('\n'.join(lines))
@@ -0,0 +1,270 @@
+"""
+Per-request timing and Prometheus metrics for the summit hikes API.
+Handlers record named stage spans (connect, query, fetch, sort, serialize,
+...) and row counts into a context-local RequestTimings; middleware reports
+them to the client in a Server-Timing header, aggregates request and stage
+latencies into per-route histograms for /metrics, and optionally logs slow
+requests with the SQL they ran.
+"""
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_request_log = logging.getLogger('summit_hikes.slow_requests')
+
+
+class RequestTimings:
+    """Stage durations, row count and (when capturing) SQL of one request."""
+
+    def __init__(self, capture_statements: bool = False):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.rows: Optional[int] = None
+        self.statements: Optional[List[str]] = [] if capture_statements else None
+
+    def add(self, name: str, seconds: float):
+        """Add seconds to a stage; repeated spans of a stage accumulate."""
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> bytes:
+        """Server-Timing header value, durations in milliseconds."""
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.spans.items()]
+        if self.rows is not None:
+            entries.append(f'rows;desc="{self.rows}"')
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ', '.join(entries).encode()
+
+
+_current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the with block as a stage of the current request. Spans may nest,
+    so stage durations can add up to more than the total."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def record_rows(count: int):
+    """Note how many rows the current request returns."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.rows = count
+
+
+@contextmanager
+def traced(conn) -> Iterator[None]:
+    """Record the SQL (with bound values) that conn runs in the with block,
+    if the current request is capturing statements for the slow log.
+    Statements SQLite runs internally, such as FTS5 lookups, are left out."""
+    timings = _current_timings.get()
+    if timings is None or timings.statements is None:
+        yield
+        return
+
+    def record(statement: str):
+        if not statement.startswith('--'):
+            timings.statements.append(statement)
+
+    conn.set_trace_callback(record)
+    try:
+        yield
+    finally:
+        conn.set_trace_callback(None)
+
+
+def escape_label_value(value: str) -> str:
+    """Label value escaped for the Prometheus text format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    """Prometheus label set, e.g. {route="/hikes",le="0.1"}."""
+    pairs = [f'{name}="{escape_label_value(str(value))}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: count in each bucket (not cumulative), then +Inf, sum
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, labels, [('le', le)])} {cumulative:g}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Request metrics plus gauges and counters read from other components
+    when /metrics is scraped."""
+
+    def __init__(self, prefix: str = 'summit_hikes'):
+        self.prefix = prefix
+        self.requests = Counter(f'{prefix}_requests_total', "Requests handled", ('route', 'method', 'status'))
+        self.request_duration = Histogram(
+            f'{prefix}_request_duration_seconds', "Time to complete a request", ('route', 'method')
+        )
+        self.stage_duration = Histogram(
+            f'{prefix}_stage_duration_seconds', "Time spent in each request stage", ('route', 'stage')
+        )
+        self.rows = Counter(f'{prefix}_rows_returned_total', "Rows returned in responses", ('route',))
+        self.slow_requests = Counter(f'{prefix}_slow_requests_total', "Requests over the slow log threshold", ('route',))
+        self._collectors: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    def add_collector(self, name: str, metric_type: str, help_text: str, read: Callable[[], float]):
+        """Report read() as a gauge or counter named prefix_name on every scrape."""
+        self._collectors.append((f'{self.prefix}_{name}', metric_type, help_text, read))
+
+    def observe(self, route: str, method: str, status: int, duration: float, timings: RequestTimings):
+        """Record a finished request."""
+        self.requests.inc((route, method, str(status)))
+        self.request_duration.observe((route, method), duration)
+        for stage, seconds in timings.spans.items():
+            self.stage_duration.observe((route, stage), seconds)
+        if timings.rows is not None:
+            self.rows.inc((route,), timings.rows)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in (self.requests, self.request_duration, self.stage_duration, self.rows, self.slow_requests):
+            lines.extend(metric.render())
+        for name, metric_type, help_text, read in self._collectors:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {read():g}"]
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware instrumenting every HTTP request: stage timings go to
+    the Server-Timing header and, with the total, into the registry under the
+    matched route's path template. With slow_request_seconds set, requests
+    taking longer are logged with their stages and SQL statements."""
+
+    def __init__(
+        self,
+        app,
+        registry: MetricsRegistry,
+        routes: Sequence,
+        slow_request_seconds: Optional[float] = None
+    ):
+        self.app = app
+        self.registry = registry
+        self.routes = routes
+        self.slow_request_seconds = slow_request_seconds
+
+    def route_path(self, scope) -> str:
+        """Path template of the route handling scope, keeping label values few."""
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', scope['path'])
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(capture_statements=self.slow_request_seconds is not None)
+        token = _current_timings.set(timings)
+        status = 500
+
+        async def instrument(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message = dict(message)
+                elapsed = time.perf_counter() - timings.started
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'server-timing', timings.server_timing(elapsed))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, instrument)
+        finally:
+            _current_timings.reset(token)
+            duration = time.perf_counter() - timings.started
+            route = self.route_path(scope)
+            self.registry.observe(route, scope['method'], status, duration, timings)
+            if self.slow_request_seconds is not None and duration >= self.slow_request_seconds:
+                self.registry.slow_requests.inc((route,))
+                self.log_slow_request(scope, status, duration, timings)
+
+    def log_slow_request(self, scope, status: int, duration: float, timings: RequestTimings):
+        query = scope.get('query_string', b'').decode('latin-1')
+        stages = ' '.join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.spans.items())
+        lines = [
+            f"{scope['method']} {scope['path']}{'?' + query if query else ''} -> {status} "
+            f"in {duration * 1000:.1f}ms [{stages}]"
+        ]
+        lines += [f"  SQL: {' '.join(statement.split())}" for statement in timings.statements]
+        slow_request_log.warning('\n'.join(lines))
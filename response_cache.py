@@ -0,0 +1,226 @@
+"""
+HTTP response cache for the summit hikes API.
+Caches complete GET responses keyed on path, normalized query string and
+any request headers the content varies with, tags them with strong ETags
+and answers If-None-Match with 304. Entries are tied to a data generation
+and ignored once the database changes; the generation can also be
+reported to clients in a response header. Responses that depend on the
+current date can also be tied to a period (such as the day), so they
+expire when it rolls over even if the data has not changed.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+
+class CachedResponse(NamedTuple):
+    """A cached response body with the headers needed to replay it, and the
+    (generation, period) it is valid for."""
+    generation: Hashable
+    etag: bytes
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class LRUResponseCache:
+    """Thread-safe LRU map of cache keys to responses, bounded by entry count
+    and total body size."""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: Hashable) -> Optional[CachedResponse]:
+        """Cached response for key, or None if missing or from an older generation."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse):
+        """Store a response, evicting least recently used entries to fit."""
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous.body)
+            self._entries[key] = entry
+            self.size_bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted.body)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_query(query_string: bytes) -> str:
+    """Query string with parameters sorted so equivalent requests share a key."""
+    pairs = parse_qsl(query_string.decode('latin-1'), keep_blank_values=True)
+    return urlencode(sorted(pairs))
+
+
+def etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison)."""
+    for candidate in if_none_match.split(b','):
+        candidate = candidate.strip()
+        if candidate == b'*' or candidate.removeprefix(b'W/') == etag:
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware caching successful GET responses under path prefixes.
+    Streaming responses (no Content-Length) pass through uncached. With
+    generation_header set, every response under the prefixes carries the
+    generation (which must then be a string) it was served from. Request
+    headers named in vary (such as Accept) become part of the cache key and
+    are listed in the Vary header of GET responses. With period set, entries
+    are also only reused while period() returns the same value."""
+
+    def __init__(
+        self,
+        app,
+        cache: LRUResponseCache,
+        generation: Callable[[], Hashable],
+        path_prefixes: Sequence[str],
+        max_age: int = 60,
+        generation_header: Optional[str] = None,
+        vary: Sequence[str] = (),
+        period: Optional[Callable[[], Hashable]] = None
+    ):
+        self.app = app
+        self.cache = cache
+        self.generation = generation
+        self.path_prefixes = tuple(path_prefixes)
+        self.cache_control = f"public, max-age={max_age}".encode()
+        self.generation_header = generation_header.lower().encode() if generation_header else None
+        self.vary = tuple(name.lower().encode() for name in vary)
+        self.vary_headers = [(b'vary', ', '.join(vary).encode())] if vary else []
+        self.period = period
+
+    def _generation_headers(self, generation) -> List[Tuple[bytes, bytes]]:
+        """Header reporting generation, if one is configured."""
+        if self.generation_header is None:
+            return []
+        return [(self.generation_header, str(generation).encode())]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        # Read the generation before running the handler, so a response
+        # computed while the data changes is stored under the old generation
+        generation = self.generation()
+
+        if scope['method'] != 'GET':
+            await self._run_uncached(scope, receive, send, generation)
+            return
+
+        validity = (generation, self.period() if self.period is not None else None)
+        request_headers = dict(scope['headers'])
+        key = (
+            scope['path'],
+            normalize_query(scope['query_string']),
+            tuple(request_headers.get(name) for name in self.vary)
+        )
+        if_none_match = request_headers.get(b'if-none-match')
+
+        entry = self.cache.get(key, validity)
+        if entry is not None:
+            if if_none_match is not None and etag_matches(if_none_match, entry.etag):
+                await self._send_not_modified(send, entry.etag, generation)
+            else:
+                await self._send_cached(send, entry)
+            return
+
+        await self._run_and_store(scope, receive, send, key, generation, validity, if_none_match)
+
+    async def _run_uncached(self, scope, receive, send, generation):
+        """Run the app, only adding the generation header."""
+        async def tag(message):
+            if message['type'] == 'http.response.start':
+                message = dict(message)
+                message['headers'] = list(message.get('headers', [])) + self._generation_headers(generation)
+            await send(message)
+
+        await self.app(scope, receive, tag)
+
+    async def _run_and_store(self, scope, receive, send, key, generation, validity, if_none_match):
+        """Run the app, buffering a cacheable response so it can be tagged and stored."""
+        start_message = None
+        body_parts = []
+        buffering = False
+
+        async def capture(message):
+            nonlocal start_message, buffering
+            if message['type'] == 'http.response.start':
+                headers = dict(message.get('headers', []))
+                buffering = message['status'] == 200 and b'content-length' in headers
+                if buffering:
+                    start_message = message
+                else:
+                    message = dict(message)
+                    message['headers'] = (
+                        list(message.get('headers', [])) + self.vary_headers + self._generation_headers(generation)
+                    )
+                    await send(message)
+                return
+
+            if message['type'] == 'http.response.body' and buffering:
+                body_parts.append(message.get('body', b''))
+                if message.get('more_body', False):
+                    return
+                body = b''.join(body_parts)
+                etag = b'"' + hashlib.sha256(body).hexdigest()[:32].encode() + b'"'
+                headers = [
+                    (name, value) for name, value in start_message.get('headers', [])
+                    if name not in (b'etag', b'cache-control', b'vary')
+                ]
+                headers += [(b'etag', etag), (b'cache-control', self.cache_control)] + self.vary_headers
+                headers += self._generation_headers(generation)
+                entry = CachedResponse(validity, etag, headers, body)
+                self.cache.put(key, entry)
+
+                if if_none_match is not None and etag_matches(if_none_match, etag):
+                    await self._send_not_modified(send, etag, generation)
+                else:
+                    await self._send_cached(send, entry)
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    async def _send_cached(self, send, entry: CachedResponse):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': entry.headers})
+        await send({'type': 'http.response.body', 'body': entry.body})
+
+    async def _send_not_modified(self, send, etag: bytes, generation):
+        headers = [(b'etag', etag), (b'cache-control', self.cache_control)] + self.vary_headers
+        await send({
+            'type': 'http.response.start',
+            'status': 304,
+            'headers': headers + self._generation_headers(generation)
+        })
+        await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,117 @@
+"""
+Binary encodings of /hikes rows, chosen by the Accept header.
+MessagePack carries the same objects as JSON more compactly; Arrow IPC
+streams carry rows as typed columns that analytics clients can load without
+parsing. Both libraries are optional and only needed for their format.
+"""
+
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+ARROW = 'arrow'
+
+# Media types accepted for each format; the first is sent in Content-Type
+MEDIA_TYPES = {
+    JSON: ('application/json',),
+    MSGPACK: ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'),
+    ARROW: ('application/vnd.apache.arrow.stream',)
+}
+
+LIBRARY_NAMES = {MSGPACK: 'msgpack', ARROW: 'pyarrow'}
+
+
+class UnsupportedFormat(Exception):
+    """Raised when the negotiated format's library is not installed."""
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Format preferred by an Accept header. Anything without an explicit
+    preference for a binary format (including */* and no header) gets JSON."""
+    best, best_quality = JSON, 0.0
+    for part in (accept or '').split(','):
+        media_type, *params = [piece.strip() for piece in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        for name, media_types in MEDIA_TYPES.items():
+            # Ties keep the earlier entry, as the client listed it first
+            if media_type.lower() in media_types and quality > best_quality:
+                best, best_quality = name, quality
+    return best
+
+
+def check_available(output_format: str):
+    """Raise UnsupportedFormat if output_format needs a library that is missing."""
+    if (output_format == MSGPACK and msgpack is None) or (output_format == ARROW and pyarrow is None):
+        raise UnsupportedFormat(f"{LIBRARY_NAMES[output_format]} is not installed on this server")
+
+
+def media_type(output_format: str) -> str:
+    """Content-Type for a format."""
+    return MEDIA_TYPES[output_format][0]
+
+
+def encode_msgpack(rows: List[Dict[str, Any]]) -> bytes:
+    """MessagePack array of row maps."""
+    return msgpack.packb(rows, use_bin_type=True)
+
+
+def stream_msgpack(row_count: int, chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """MessagePack array of row_count row maps, encoded a chunk at a time."""
+    packer = msgpack.Packer(use_bin_type=True)
+    yield packer.pack_array_header(row_count)
+    for rows in chunks:
+        yield b''.join(packer.pack(row) for row in rows)
+
+
+def arrow_schema(sample: Dict[str, Any]):
+    """Arrow schema for rows shaped like sample, which maps each field to a
+    representative non-null value (or None if the field is always null)."""
+    return pyarrow.RecordBatch.from_pydict({name: [value] for name, value in sample.items()}).schema
+
+
+def encode_arrow(columns: Dict[str, List[Any]], schema) -> bytes:
+    """Arrow IPC stream holding the rows as a single record batch."""
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pyarrow.RecordBatch.from_pydict(columns, schema=schema))
+    return sink.getvalue()
+
+
+def stream_arrow(chunks: Iterable[Dict[str, List[Any]]], schema) -> Iterator[bytes]:
+    """Arrow IPC stream with one record batch per chunk of columns, yielding
+    each message as soon as it is written."""
+    sink = io.BytesIO()
+
+    def flush() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    writer = pyarrow.ipc.new_stream(sink, schema)
+    yield flush()
+    for columns in chunks:
+        writer.write_batch(pyarrow.RecordBatch.from_pydict(columns, schema=schema))
+        yield flush()
+    writer.close()
+    yield flush()
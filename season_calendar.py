@@ -0,0 +1,125 @@
+"""
+Day-of-year climbing season calendar for the summit hikes API.
+Each hike's climbing seasons are expanded once into a 366-bit bitmap, so
+"is this hike in season on date D, give or take B days" is a bit test.
+Buffered bitmaps are derived separately for leap and common years, so a
+buffer reaching across the end of February counts the days that year has.
+"""
+
+import calendar
+import threading
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+DAYS_IN_CALENDAR = 366
+
+# Bytes in each hike's packed bitmap
+BITMAP_BYTES = (DAYS_IN_CALENDAR + 7) // 8
+
+# Calendar index of the first day of each month, laid out on a leap year so
+# February 29 has its own slot; the 13th entry closes December
+MONTH_STARTS = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366)
+
+# Calendar index of February 29, which common years skip
+LEAP_DAY = 59
+
+# Cache key of the unbuffered bitmap, which serves leap and common years alike
+UNBUFFERED = (0, True)
+
+# Buffered bitmaps kept (per buffer size and kind of year) before the oldest is dropped
+MAX_CACHED_BUFFERS = 16
+
+
+def day_of_year(day: date) -> int:
+    """Calendar index (0-365) of a date, ignoring the year."""
+    return MONTH_STARTS[day.month - 1] + day.day - 1
+
+
+def season_days(start_month: int, end_month: int) -> np.ndarray:
+    """Boolean day mask for a season running from the first day of start_month
+    to the last day of end_month, wrapping past December if needed."""
+    days = np.zeros(DAYS_IN_CALENDAR, dtype=bool)
+    start = MONTH_STARTS[start_month - 1]
+    end = MONTH_STARTS[end_month]
+    if start_month <= end_month:
+        days[start:end] = True
+    else:
+        days[start:] = True
+        days[:end] = True
+    return days
+
+
+class SeasonCalendar:
+    """Packed 366-bit in-season bitmap per hike, with buffered variants
+    derived on first use and cached per buffer size and kind of year."""
+
+    def __init__(self, seasons_per_row: List[List[Tuple[int, int]]]):
+        days = np.zeros((len(seasons_per_row), DAYS_IN_CALENDAR), dtype=bool)
+        for row, seasons in enumerate(seasons_per_row):
+            for start_month, end_month in seasons:
+                days[row] |= season_days(start_month, end_month)
+
+        self._days = days
+        self._bitmaps: Dict[Tuple[int, bool], np.ndarray] = {UNBUFFERED: np.packbits(days, axis=1)}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bitmap(cls, bitmap: np.ndarray) -> 'SeasonCalendar':
+        """Calendar over another calendar's bitmap, flattened or not."""
+        bitmap = bitmap.reshape(-1, BITMAP_BYTES)
+        season_calendar = cls.__new__(cls)
+        season_calendar._days = np.unpackbits(bitmap, axis=1, count=DAYS_IN_CALENDAR).astype(bool)
+        season_calendar._bitmaps = {UNBUFFERED: bitmap}
+        season_calendar._lock = threading.Lock()
+        return season_calendar
+
+    @property
+    def bitmap(self) -> np.ndarray:
+        """Unbuffered packed bitmaps, one row of BITMAP_BYTES per hike."""
+        return self._bitmaps[UNBUFFERED]
+
+    def _bitmap(self, buffer_days: int, leap_year: bool) -> np.ndarray:
+        """Packed bitmaps with every season widened by buffer_days on both
+        sides, counting days as a leap or a common year has them."""
+        buffer_days = min(buffer_days, DAYS_IN_CALENDAR // 2)
+        key = (buffer_days, leap_year) if buffer_days else UNBUFFERED
+        bitmap = self._bitmaps.get(key)
+        if bitmap is not None:
+            return bitmap
+
+        # A day is in the widened season if any day within buffer_days of it
+        # (wrapping around the year) is in season: a sliding-window sum.
+        # Common years slide over 365 days, without February 29
+        days = self._days.astype(np.int32)
+        if not leap_year:
+            days = np.delete(days, LEAP_DAY, axis=1)
+        padded = np.concatenate([days[:, -buffer_days:], days, days[:, :buffer_days]], axis=1)
+        totals = np.cumsum(padded, axis=1)
+        totals = np.concatenate([np.zeros((len(days), 1), dtype=totals.dtype), totals], axis=1)
+        window = 2 * buffer_days + 1
+        widened = (totals[:, window:] - totals[:, :-window]) > 0
+        if not leap_year:
+            # Put back the February 29 slot (never looked up) to keep the layout
+            widened = np.insert(widened, LEAP_DAY, widened[:, LEAP_DAY - 1], axis=1)
+        bitmap = np.packbits(widened, axis=1)
+
+        with self._lock:
+            if len(self._bitmaps) >= MAX_CACHED_BUFFERS:
+                oldest = next(cached for cached in self._bitmaps if cached != UNBUFFERED)
+                del self._bitmaps[oldest]
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def in_season(self, day: date, buffer_days: int = 0) -> np.ndarray:
+        """Mask of hikes in season on day, give or take buffer_days."""
+        index = day_of_year(day)
+        column = self._bitmap(buffer_days, calendar.isleap(day.year))[:, index >> 3]
+        return ((column >> (7 - (index & 7))) & 1).astype(bool)
+
+    def contains(self, row: int, day: date, buffer_days: int = 0) -> bool:
+        """Whether a single hike is in season on day, give or take buffer_days."""
+        index = day_of_year(day)
+        return bool((self._bitmap(buffer_days, calendar.isleap(day.year))[row, index >> 3] >> (7 - (index & 7))) & 1)
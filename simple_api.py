@@ -4,16 +4,198 @@ Simple FastAPI application for summit hikes database.
 Provides RESTful endpoints for filtering and sorting hikes.
 """
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, Body, Depends, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import asyncio
+import math
+import os
 import sqlite3
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Iterator, List, NamedTuple, Optional, Dict, Any
 from pathlib import Path
-import json
-import math
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager, contextmanager
+from datetime import date
+
+import numpy as np
+import orjson
+
+from concurrency import BlockingExecutor, ConcurrencyCounters, ConcurrencyLimitMiddleware, inline_dependency
+from db_pool import ActivePool, PoolTimeout
+from geo import DENVER_LAT, DENVER_LON
+from hike_catalog import CatalogCache, HikeCatalog
+from hike_facets import FOURTEENER_ELEVATION
+from hike_similarity import CACHED_NEIGHBORS
+from hike_search import build_match_query, fetch_snippets, rank_matches
+from pagination import Cursor, decode_cursor, encode_cursor
+from query_plans import QueryPlanner, id_list_sql, padded_ids
+from request_metrics import MetricsRegistry, RequestMetricsMiddleware, record_rows, span, traced
+import response_formats
+from response_cache import LRUResponseCache, ResponseCacheMiddleware
+from trip_planner import OBJECTIVES, hike_scores, search_plans
+
+# Database served by the API; may be a symlink that is re-pointed to swap in new data
+DB_PATH = Path(os.environ.get("SUMMIT_HIKES_DB_PATH", Path(__file__).parent / "summit_hikes.db"))
+
+# Page sizes for /hikes, and rows serialized per chunk when streaming
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+# Most hikes fetched by one /hikes/batch request
+MAX_BATCH_SIZE = 200
+
+# Most hikes returned by /hikes/{id}/similar
+MAX_SIMILAR_HIKES = CACHED_NEIGHBORS
+
+# Limits for /plan: trip length, hikes per day, plans returned, and the
+# default and largest search time budget in milliseconds
+MAX_PLAN_DAYS = 7
+MAX_HIKES_PER_DAY = 3
+MAX_PLANS = 20
+PLAN_TIME_BUDGET_MS = 250
+MAX_PLAN_TIME_BUDGET_MS = 2000
+
+# Fields of each hike listed in a /plan itinerary
+PLAN_HIKE_FIELDS = (
+    'id', 'name', 'highest_peak_elevation', 'round_trip_miles', 'total_elevation_gain',
+    'hiking_time_min', 'hiking_time_max', 'difficulty_rating', 'class_numeric', 'crowd_level_numeric'
+)
+
+# Paths served from the database, subject to caching and concurrency limits
+DATA_PATH_PREFIXES = ("/hikes", "/facets", "/stats", "/trailheads", "/plan")
+
+# Days before and after a climbing season that still count as in season
+SEASON_BUFFER_DAYS = 15
+
+# Connection pool settings (override with environment variables)
+DB_POOL_SIZE = int(os.environ.get("SUMMIT_HIKES_DB_POOL_SIZE", 8))
+DB_POOL_TIMEOUT = float(os.environ.get("SUMMIT_HIKES_DB_POOL_TIMEOUT", 5.0))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("SUMMIT_HIKES_STATEMENT_CACHE_SIZE", 64))
+
+# Seconds between checks for a new or changed database, and how long a
+# replaced database's pool waits for in-flight requests before closing
+DB_WATCH_INTERVAL = float(os.environ.get("SUMMIT_HIKES_DB_WATCH_INTERVAL", 1.0))
+DB_DRAIN_TIMEOUT = float(os.environ.get("SUMMIT_HIKES_DB_DRAIN_TIMEOUT", 30.0))
+
+# Request concurrency settings (override with environment variables): threads
+# running blocking database and catalog work, requests handled at once,
+# requests allowed to wait for a slot, and how long they may wait before 429
+EXECUTOR_WORKERS = int(os.environ.get("SUMMIT_HIKES_EXECUTOR_WORKERS", DB_POOL_SIZE))
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("SUMMIT_HIKES_MAX_CONCURRENT_REQUESTS", 2 * EXECUTOR_WORKERS))
+MAX_QUEUED_REQUESTS = int(os.environ.get("SUMMIT_HIKES_MAX_QUEUED_REQUESTS", 64))
+REQUEST_QUEUE_TIMEOUT = float(os.environ.get("SUMMIT_HIKES_REQUEST_QUEUE_TIMEOUT", 2.0))
+
+# Response cache settings (override with environment variables)
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("SUMMIT_HIKES_CACHE_ENTRIES", 512))
+RESPONSE_CACHE_BYTES = int(os.environ.get("SUMMIT_HIKES_CACHE_BYTES", 32 * 1024 * 1024))
+RESPONSE_CACHE_MAX_AGE = int(os.environ.get("SUMMIT_HIKES_CACHE_MAX_AGE", 60))
+
+# Requests slower than this many milliseconds are logged with their SQL
+# (override with an environment variable; 0 turns the slow log off)
+SLOW_REQUEST_MS = float(os.environ.get("SUMMIT_HIKES_SLOW_REQUEST_MS", 0))
+
+# Log the EXPLAIN QUERY PLAN of each distinct statement the first time it
+# runs, flagging full table scans and temporary B-tree sorts
+EXPLAIN_QUERIES = os.environ.get("SUMMIT_HIKES_EXPLAIN_QUERIES", "").lower() in ("1", "true", "yes")
 
-app = FastAPI(title="Summit Hikes API")
+# Pooled read-only connections shared by all request handlers, replaced
+# when a new database file is swapped in
+db_pool = ActivePool(
+    DB_PATH,
+    drain_timeout=DB_DRAIN_TIMEOUT,
+    size=DB_POOL_SIZE,
+    statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    timeout=DB_POOL_TIMEOUT
+)
+
+# Runs the detail and stats statements, explaining them in diagnostic mode
+query_planner = QueryPlanner(explain=EXPLAIN_QUERIES)
+
+# Threads running the blocking part of every data endpoint
+db_executor = BlockingExecutor(EXECUTOR_WORKERS, thread_name_prefix="summit-hikes-db")
+
+# In-memory hike catalog; requests use the loaded one and the database
+# watcher swaps in a reloaded one whenever the database changes
+catalog_cache = CatalogCache(DB_PATH, DENVER_LAT, DENVER_LON)
+
+
+def refresh_database():
+    """Switch the pool and catalog over to the database now at DB_PATH, if it changed."""
+    db_pool.refresh()
+    catalog_cache.get()
+
+
+async def watch_database():
+    """Poll for database changes, loading new data off the event loop so
+    requests keep being served from the old data until it is ready."""
+    while True:
+        await asyncio.sleep(DB_WATCH_INTERVAL)
+        try:
+            await asyncio.to_thread(refresh_database)
+        except (OSError, sqlite3.Error):
+            # Mid-swap or half-written database; keep serving and retry
+            continue
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the hike catalog before serving the first request and keep it
+    in step with the database until shutdown."""
+    if DB_PATH.exists():
+        refresh_database()
+    watcher = asyncio.create_task(watch_database())
+    yield
+    watcher.cancel()
+    db_executor.shutdown()
+    db_pool.close()
+
+
+app = FastAPI(title="Summit Hikes API", lifespan=lifespan)
+
+# Limit requests that miss the response cache; it is added first so cached
+# responses are answered without taking a slot
+request_slots = ConcurrencyCounters()
+app.add_middleware(
+    ConcurrencyLimitMiddleware,
+    max_concurrent=MAX_CONCURRENT_REQUESTS,
+    max_queued=MAX_QUEUED_REQUESTS,
+    path_prefixes=DATA_PATH_PREFIXES,
+    queue_timeout=REQUEST_QUEUE_TIMEOUT,
+    counters=request_slots
+)
+
+# Cache read endpoints until the database or the day changes; CORS is added
+# after so it wraps cached responses too
+response_cache = LRUResponseCache(max_entries=RESPONSE_CACHE_ENTRIES, max_bytes=RESPONSE_CACHE_BYTES)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    generation=lambda: catalog_cache.current().generation_label,
+    path_prefixes=DATA_PATH_PREFIXES,
+    max_age=RESPONSE_CACHE_MAX_AGE,
+    generation_header="X-Data-Generation",
+    vary=("Accept",),
+    # Season fields and filters default to today, so entries expire daily
+    period=lambda: date.today()
+)
+
+# Time every request, cached or not, for Server-Timing and /metrics
+metrics = MetricsRegistry()
+metrics.add_collector("response_cache_hits_total", "counter", "Response cache hits", lambda: response_cache.hits)
+metrics.add_collector("response_cache_misses_total", "counter", "Response cache misses", lambda: response_cache.misses)
+metrics.add_collector("response_cache_entries", "gauge", "Responses in the cache", lambda: len(response_cache))
+metrics.add_collector("response_cache_bytes", "gauge", "Bytes of cached response bodies", lambda: response_cache.size_bytes)
+metrics.add_collector("requests_active", "gauge", "Requests holding a concurrency slot", lambda: request_slots.active)
+metrics.add_collector("requests_queued", "gauge", "Requests waiting for a concurrency slot", lambda: request_slots.waiting)
+metrics.add_collector("requests_rejected_total", "counter", "Requests turned away with 429", lambda: request_slots.rejected)
+metrics.add_collector("catalog_hikes", "gauge", "Hikes in the served catalog", lambda: len(catalog_cache.current()))
+app.add_middleware(
+    RequestMetricsMiddleware,
+    registry=metrics,
+    routes=app.routes,
+    slow_request_seconds=SLOW_REQUEST_MS / 1000 if SLOW_REQUEST_MS > 0 else None
+)
 
 # Enable CORS for web app
 app.add_middleware(
@@ -22,20 +204,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "X-Data-Generation", "Server-Timing"],
 )
 
-DB_PATH = Path(__file__).parent / "summit_hikes.db"
-
-# Denver coordinates (downtown Denver)
-DENVER_LAT = 39.7392
-DENVER_LON = -104.9903
 
-
-def get_db():
-    """Get database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled database connection, answering 503 if none is free."""
+    # Release to the pool the connection came from, even if it is swapped out meanwhile
+    pool = db_pool.current()
+    try:
+        with span("connect"):
+            conn = pool.acquire()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Database busy, try again")
+    try:
+        with traced(conn):
+            yield conn
+    finally:
+        pool.release(conn)
 
 
 def dict_from_row(row):
@@ -43,352 +230,701 @@ def dict_from_row(row):
     return dict(zip(row.keys(), row))
 
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate crow-flies distance between two points using Haversine formula.
-    Returns distance in miles."""
-    R = 3959  # Earth's radius in miles
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    return R * c
-
-
-def is_in_season(start_month, end_month, buffer_days=15):
-    """Check if current date is within climbing season, with buffer.
-    Buffer allows seeing hikes that are about to come into season or about to go out."""
-    current_date = datetime.now()
-    current_year = current_date.year
-    
-    # Create season start and end dates
-    if start_month <= end_month:
-        # Season within same year (e.g., May to October)
-        season_start = datetime(current_year, start_month, 1)
-        # Get last day of end month
-        if end_month == 12:
-            season_end = datetime(current_year, 12, 31)
-        else:
-            season_end = datetime(current_year, end_month + 1, 1).replace(day=1) - timedelta(days=1)
-    else:
-        # Season crosses year boundary (e.g., November to March)
-        if current_date.month >= start_month:
-            # We're in the start year
-            season_start = datetime(current_year, start_month, 1)
-            season_end = datetime(current_year + 1, end_month + 1, 1).replace(day=1) - timedelta(days=1)
-        else:
-            # We're in the end year
-            season_start = datetime(current_year - 1, start_month, 1)
-            if end_month == 12:
-                season_end = datetime(current_year, 12, 31)
-            else:
-                season_end = datetime(current_year, end_month + 1, 1).replace(day=1) - timedelta(days=1)
-    
-    # Apply buffer
-    season_start_buffered = season_start - timedelta(days=buffer_days)
-    season_end_buffered = season_end + timedelta(days=buffer_days)
-    
-    return season_start_buffered <= current_date <= season_end_buffered
+def parse_coordinates(value: str, name: str, count: int) -> List[float]:
+    """Parse a comma-separated list of numbers from a query parameter."""
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or any(math.isnan(n) or math.isinf(n) for n in numbers):
+        raise HTTPException(status_code=400, detail=f"{name} must be {count} comma-separated numbers")
+    return numbers
 
 
 @app.get("/")
-def root():
+async def root():
     """API root endpoint."""
     return {
         "message": "Summit Hikes API",
         "endpoints": {
             "/hikes": "List all hikes with filtering and sorting",
             "/hikes/{id}": "Get single hike details",
-            "/stats": "Get database statistics"
+            "/hikes/{id}/similar": "Hikes most like a given hike (accepts the /hikes filters)",
+            "/hikes/batch": "Get details for several hikes (ids=1,2,3 or POST {\"ids\": [...]})",
+            "/trailheads/nearest": "Find the trailheads closest to a point",
+            "/facets": "Counts of the filtered hikes per facet value (same filters as /hikes)",
+            "/plan": "Best sets of hikes for a trip under time, distance and difficulty limits",
+            "/stats": "Get database statistics",
+            "/metrics": "Request latency, stage timing and cache metrics for Prometheus"
         }
     }
 
 
+@dataclass(frozen=True)
+class HikeFilters:
+    """Filter parameters shared by /hikes and /facets."""
+    max_difficulty: Optional[float] = Query(None, ge=1, le=10)
+    min_difficulty: Optional[float] = Query(None, ge=1, le=10)
+    max_distance: Optional[float] = Query(None, gt=0)
+    min_distance: Optional[float] = Query(None, gt=0)
+    max_time: Optional[float] = Query(None, gt=0)
+    min_time: Optional[float] = Query(None, gt=0)
+    max_elevation_gain: Optional[int] = Query(None, gt=0)
+    min_elevation_gain: Optional[int] = Query(None, gt=0)
+    max_class: Optional[float] = Query(None, ge=1, le=4)
+    max_crowd: Optional[int] = Query(None, ge=1, le=5)
+    fourteeners_only: bool = Query(False)
+    overnight_only: bool = Query(False)
+    in_season_only: bool = Query(False)
+    season_date: Optional[date] = Query(None, alias="date")
+    season_buffer_days: int = Query(SEASON_BUFFER_DAYS, ge=0, le=183)
+    search: Optional[str] = Query(None)
+    max_distance_from_denver: Optional[float] = Query(None, gt=0)
+    min_distance_from_denver: Optional[float] = Query(None, gt=0)
+    
+    # Distance from an arbitrary origin (defaults to Denver)
+    origin_lat: Optional[float] = Query(None, ge=-90, le=90)
+    origin_lon: Optional[float] = Query(None, ge=-180, le=180)
+    max_distance_from_origin: Optional[float] = Query(None, gt=0)
+    min_distance_from_origin: Optional[float] = Query(None, gt=0)
+    
+    # Spatial filters: near=lat,lon with radius in miles, bbox=min_lat,min_lon,max_lat,max_lon
+    near: Optional[str] = Query(None)
+    radius: Optional[float] = Query(None, gt=0)
+    bbox: Optional[str] = Query(None)
+
+
+class HikeSelection(NamedTuple):
+    """Catalog rows matching a HikeFilters, with the per-request columns
+    computed while filtering."""
+    mask: np.ndarray
+    origin_distances: np.ndarray
+    in_season: np.ndarray
+    relevance: Optional[np.ndarray]
+    match_query: Optional[str]
+
+
+def select_hikes(catalog: HikeCatalog, filters: HikeFilters) -> HikeSelection:
+    """Build the mask of catalog rows matching filters."""
+    if (filters.origin_lat is None) != (filters.origin_lon is None):
+        raise HTTPException(status_code=400, detail="origin_lat and origin_lon must be given together")
+    
+    columns = catalog.columns
+    
+    # Distances from the requested origin in one pass over all trailheads
+    if filters.origin_lat is None:
+        origin_distances = columns['distance_from_denver']
+    else:
+        origin_distances = catalog.distances_from(filters.origin_lat, filters.origin_lon)
+    
+    # Build filter mask
+    mask = catalog.match_all()
+    
+    if filters.max_difficulty is not None:
+        mask &= columns['difficulty_rating'] <= filters.max_difficulty
+    
+    if filters.min_difficulty is not None:
+        mask &= columns['difficulty_rating'] >= filters.min_difficulty
+    
+    if filters.max_distance is not None:
+        mask &= columns['round_trip_miles'] <= filters.max_distance
+    
+    if filters.min_distance is not None:
+        mask &= columns['round_trip_miles'] >= filters.min_distance
+    
+    if filters.max_time is not None:
+        mask &= columns['hiking_time_max'] <= filters.max_time
+    
+    if filters.min_time is not None:
+        mask &= columns['hiking_time_min'] >= filters.min_time
+    
+    if filters.max_elevation_gain is not None:
+        mask &= columns['total_elevation_gain'] <= filters.max_elevation_gain
+    
+    if filters.min_elevation_gain is not None:
+        mask &= columns['total_elevation_gain'] >= filters.min_elevation_gain
+    
+    if filters.max_class is not None:
+        mask &= columns['class_numeric'] <= filters.max_class
+    
+    if filters.max_crowd is not None:
+        mask &= columns['crowd_level_numeric'] <= filters.max_crowd
+    
+    if filters.fourteeners_only:
+        mask &= columns['highest_peak_elevation'] >= 14000
+    
+    if filters.overnight_only:
+        mask &= columns['is_overnight'] == 1
+    
+    # Full-text search ranks every match; snippets are fetched for the page only
+    match_query = None
+    relevance = None
+    if filters.search:
+        if catalog.has_full_text_index:
+            match_query = build_match_query(filters.search)
+            matches = []
+            if match_query:
+                with pooled_connection() as conn, span("search"):
+                    matches = rank_matches(conn, match_query)
+            relevance = catalog.scores(matches)
+            mask &= ~np.isnan(relevance)
+        else:
+            mask &= catalog.search(filters.search)
+    
+    # Season check is a bit test per hike; filtering happens before pagination
+    in_season = catalog.season_calendar.in_season(
+        filters.season_date or date.today(), filters.season_buffer_days
+    )
+    if filters.in_season_only:
+        mask &= in_season
+    
+    if filters.max_distance_from_denver is not None:
+        mask &= columns['distance_from_denver'] <= filters.max_distance_from_denver
+    
+    if filters.min_distance_from_denver is not None:
+        mask &= columns['distance_from_denver'] >= filters.min_distance_from_denver
+    
+    if filters.near is not None:
+        if filters.radius is None:
+            raise HTTPException(status_code=400, detail="near requires a radius")
+        near_lat, near_lon = parse_coordinates(filters.near, "near", 2)
+        mask &= catalog.mask_of(catalog.trailhead_index.within_radius(near_lat, near_lon, filters.radius))
+    
+    if filters.bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = parse_coordinates(filters.bbox, "bbox", 4)
+        if min_lat > max_lat or min_lon > max_lon:
+            raise HTTPException(status_code=400, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+        mask &= catalog.mask_of(catalog.trailhead_index.within_bbox(min_lat, min_lon, max_lat, max_lon))
+    
+    if filters.max_distance_from_origin is not None:
+        mask &= origin_distances <= filters.max_distance_from_origin
+    
+    if filters.min_distance_from_origin is not None:
+        mask &= origin_distances >= filters.min_distance_from_origin
+    
+    return HikeSelection(mask, origin_distances, in_season, relevance, match_query)
+
+
 @app.get("/hikes")
+@db_executor.asynchronous
 def get_hikes(
-    # Filtering parameters
-    max_difficulty: Optional[float] = Query(None, ge=1, le=10),
-    min_difficulty: Optional[float] = Query(None, ge=1, le=10),
-    max_distance: Optional[float] = Query(None, gt=0),
-    min_distance: Optional[float] = Query(None, gt=0),
-    max_time: Optional[float] = Query(None, gt=0),
-    min_time: Optional[float] = Query(None, gt=0),
-    max_elevation_gain: Optional[int] = Query(None, gt=0),
-    min_elevation_gain: Optional[int] = Query(None, gt=0),
-    max_class: Optional[float] = Query(None, ge=1, le=4),
-    max_crowd: Optional[int] = Query(None, ge=1, le=5),
-    fourteeners_only: bool = Query(False),
-    overnight_only: bool = Query(False),
-    in_season_only: bool = Query(False),
-    search: Optional[str] = Query(None),
-    max_distance_from_denver: Optional[float] = Query(None, gt=0),
-    min_distance_from_denver: Optional[float] = Query(None, gt=0),
+    filters: HikeFilters = Depends(inline_dependency(HikeFilters)),
     
     # Sorting parameters
-    sort_by: str = Query("number", pattern="^(number|name|difficulty_rating|round_trip_miles|total_elevation_gain|highest_peak_elevation|class_numeric|hiking_time_min|hiking_time_max|distance_from_denver)$"),
+    sort_by: str = Query("number", pattern="^(number|name|difficulty_rating|round_trip_miles|total_elevation_gain|highest_peak_elevation|class_numeric|hiking_time_min|hiking_time_max|distance_from_denver|distance_from_origin|relevance)$"),
     sort_order: str = Query("asc", pattern="^(asc|desc)$"),
     
-    # Pagination
-    limit: int = Query(100, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    # Pagination: offset or an opaque cursor from X-Next-Cursor;
+    # stream returns every matching hike as one chunked JSON array
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    
+    # Output format: ndjson streams every matching hike, one object per line;
+    # otherwise Accept picks JSON, MessagePack or Arrow IPC
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    accept: Optional[str] = Header(None),
+    
+    # Projection: comma-separated fields to return instead of whole hikes
+    fields: Optional[str] = Query(None)
 ) -> List[Dict[str, Any]]:
-    """Get filtered and sorted list of hikes."""
-    
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    
-    if max_difficulty is not None:
-        where_conditions.append("difficulty_rating <= ?")
-        params.append(max_difficulty)
-    
-    if min_difficulty is not None:
-        where_conditions.append("difficulty_rating >= ?")
-        params.append(min_difficulty)
-    
-    if max_distance is not None:
-        where_conditions.append("round_trip_miles <= ?")
-        params.append(max_distance)
-    
-    if min_distance is not None:
-        where_conditions.append("round_trip_miles >= ?")
-        params.append(min_distance)
-    
-    if max_time is not None:
-        where_conditions.append("hiking_time_max <= ?")
-        params.append(max_time)
-    
-    if min_time is not None:
-        where_conditions.append("hiking_time_min >= ?")
-        params.append(min_time)
-    
-    if max_elevation_gain is not None:
-        where_conditions.append("total_elevation_gain <= ?")
-        params.append(max_elevation_gain)
-    
-    if min_elevation_gain is not None:
-        where_conditions.append("total_elevation_gain >= ?")
-        params.append(min_elevation_gain)
-    
-    if max_class is not None:
-        where_conditions.append("class_numeric <= ?")
-        params.append(max_class)
-    
-    if max_crowd is not None:
-        where_conditions.append("crowd_level_numeric <= ?")
-        params.append(max_crowd)
-    
-    if fourteeners_only:
-        where_conditions.append("highest_peak_elevation >= 14000")
-    
-    if overnight_only:
-        where_conditions.append("is_overnight = 1")
-    
-    if search:
-        where_conditions.append("(name LIKE ? OR description LIKE ?)")
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term])
-    
-    # Build query with trailhead join for distance calculation
-    query = """
-        SELECT DISTINCT
-            h.*,
-            t.latitude,
-            t.longitude,
-            ROUND(
-                3959 * ACOS(
-                    COS(RADIANS(?)) * COS(RADIANS(t.latitude)) *
-                    COS(RADIANS(t.longitude) - RADIANS(?)) +
-                    SIN(RADIANS(?)) * SIN(RADIANS(t.latitude))
-                ), 1
-            ) as distance_from_denver
-        FROM hikes_with_peaks h
-        LEFT JOIN trailheads t ON h.id = t.hike_id
-    """
-    
-    # Add Denver coordinates for distance calculation
-    params = [DENVER_LAT, DENVER_LON, DENVER_LAT] + params
-    
-    if where_conditions:
-        query += " WHERE " + " AND ".join(where_conditions)
-    
-    # Handle distance filtering
-    if max_distance_from_denver is not None or min_distance_from_denver is not None:
-        having_conditions = []
-        if max_distance_from_denver is not None:
-            having_conditions.append("distance_from_denver <= ?")
-            params.append(max_distance_from_denver)
-        if min_distance_from_denver is not None:
-            having_conditions.append("distance_from_denver >= ?")
-            params.append(min_distance_from_denver)
-        
-        query += " GROUP BY h.id"
-        if having_conditions:
-            query += " HAVING " + " AND ".join(having_conditions)
-    else:
-        query += " GROUP BY h.id"
+    """Get filtered and sorted list of hikes.
+    X-Total-Count gives the number of matches; X-Next-Cursor, when present,
+    fetches the page after this one regardless of depth."""
     
-    query += f" ORDER BY {sort_by} {sort_order.upper()}"
-    query += f" LIMIT {limit} OFFSET {offset}"
+    catalog = catalog_cache.current()
+    with span("filter"):
+        selection = select_hikes(catalog, filters)
+    mask, origin_distances, in_season, relevance, match_query = selection
     
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    if output_format == "ndjson":
+        body_format = response_formats.JSON
+    else:
+        body_format = response_formats.negotiate(accept)
+        try:
+            response_formats.check_available(body_format)
+        except response_formats.UnsupportedFormat as e:
+            raise HTTPException(status_code=406, detail=str(e))
+    
+    field_list = None
+    if fields is not None:
+        field_list = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        available = set(catalog.field_samples) | {'distance_from_origin', 'is_in_season'}
+        if match_query:
+            available.add('search_snippet')
+        unknown = [name for name in field_list if name not in available]
+        if unknown or not field_list:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "fields is empty")
+    encoder = HikeRowEncoder(catalog, selection, field_list, body_format)
+    
+    # Sort and paginate row indices, then materialize only the page
+    if sort_by == "relevance":
+        if relevance is None:
+            raise HTTPException(status_code=400, detail="sort_by=relevance requires a search")
+        sort_keys = relevance
+    elif sort_by == "distance_from_origin":
+        sort_keys = origin_distances
+    else:
+        sort_keys = catalog.columns[sort_by]
+    descending = sort_order == "desc"
+    total_count = int(mask.sum())
+    
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+        try:
+            position = decode_cursor(cursor)
+            if (position.sort_by, position.sort_order) != (sort_by, sort_order):
+                raise ValueError("Cursor belongs to a different sort order")
+            mask &= catalog.after_cursor(sort_by, sort_keys, position.key, position.hike_id, descending)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Sort row indices, then materialize only the rows being returned
+    with span("sort"):
+        order = catalog.sort(mask, sort_keys, descending=descending)
+    
+    # Streamed bodies are encoded chunk by chunk on the database executor,
+    # not on Starlette's shared threadpool
+    if output_format == "ndjson":
+        record_rows(len(order))
+        return StreamingResponse(
+            db_executor.iterate(encoder.stream_ndjson(order)),
+            media_type="application/x-ndjson",
+            headers={"X-Total-Count": str(total_count)}
+        )
     
-    # Convert rows and add distance calculation and season data
-    results = []
-    hike_ids = [row['id'] for row in rows]
-    
-    # Get all climbing seasons for the hikes
-    seasons_data = {}
-    if hike_ids:
-        placeholders = ','.join('?' * len(hike_ids))
-        cursor.execute(
-            f"SELECT hike_id, start_month, end_month, season_text FROM climbing_seasons WHERE hike_id IN ({placeholders})",
-            hike_ids
+    if stream:
+        record_rows(len(order))
+        return StreamingResponse(
+            db_executor.iterate(encoder.stream(order)),
+            media_type=response_formats.media_type(body_format),
+            headers={"X-Total-Count": str(total_count)}
         )
-        for season_row in cursor.fetchall():
-            season = dict_from_row(season_row)
-            hike_id = season['hike_id']
-            if hike_id not in seasons_data:
-                seasons_data[hike_id] = []
-            seasons_data[hike_id].append({
-                'start_month': season['start_month'],
-                'end_month': season['end_month'],
-                'season_text': season['season_text']
-            })
     
-    for row in rows:
-        hike = dict_from_row(row)
-        # Ensure distance is included
-        if 'latitude' in hike and 'longitude' in hike and hike['latitude'] and hike['longitude']:
-            hike['distance_from_denver'] = round(calculate_distance(
-                DENVER_LAT, DENVER_LON, hike['latitude'], hike['longitude']
-            ), 1)
-        
-        # Add season data
-        hike_id = hike['id']
-        hike['climbing_seasons'] = seasons_data.get(hike_id, [])
-        
-        # Check if hike is in season
-        hike['is_in_season'] = False
-        for season in hike['climbing_seasons']:
-            if is_in_season(season['start_month'], season['end_month']):
-                hike['is_in_season'] = True
-                break
+    page = order[offset:offset + limit]
+    headers = {"X-Total-Count": str(total_count)}
+    if len(order) > offset + limit:
+        last = int(page[-1])
+        headers["X-Next-Cursor"] = encode_cursor(Cursor(
+            sort_by, sort_order, catalog.cursor_key(sort_by, sort_keys, last), catalog.records[last]['id']
+        ))
+    
+    with span("serialize"):
+        body = encoder.body(page)
+    record_rows(len(page))
+    return Response(body, media_type=response_formats.media_type(body_format), headers=headers)
+
+
+class HikeRowEncoder:
+    """Encodes catalog rows for a /hikes response: the catalog fields plus
+    per-request fields, optionally projected to a subset, in JSON,
+    MessagePack or Arrow."""
+    
+    def __init__(
+        self,
+        catalog: HikeCatalog,
+        selection: HikeSelection,
+        fields: Optional[List[str]] = None,
+        output_format: str = response_formats.JSON
+    ):
+        self.catalog = catalog
+        self.selection = selection
+        self.output_format = output_format
+        self.projected = fields is not None
         
-        # Apply in-season filter if requested
-        if not in_season_only or hike['is_in_season']:
-            results.append(hike)
+        extra_fields = ['distance_from_origin', 'is_in_season']
+        if selection.match_query:
+            extra_fields.append('search_snippet')
+        self.fields = fields if fields is not None else list(catalog.field_samples) + extra_fields
+        self.extra_fields = [name for name in extra_fields if name in self.fields]
+    
+    def extra_columns(self, indices: np.ndarray) -> Dict[str, List[Any]]:
+        """Per-request fields for the given catalog rows."""
+        columns = {}
+        if 'distance_from_origin' in self.extra_fields:
+            columns['distance_from_origin'] = [
+                None if math.isnan(distance) else distance
+                for distance in self.selection.origin_distances[indices].tolist()
+            ]
+        if 'is_in_season' in self.extra_fields:
+            columns['is_in_season'] = self.selection.in_season[indices].tolist()
+        if 'search_snippet' in self.extra_fields:
+            hike_ids = self.catalog.columns['id'][indices].astype(int).tolist()
+            with pooled_connection() as conn, span("query"):
+                snippets = fetch_snippets(conn, self.selection.match_query, hike_ids)
+            columns['search_snippet'] = [snippets.get(hike_id) for hike_id in hike_ids]
+        return columns
+    
+    def columns(self, indices: np.ndarray) -> Dict[str, List[Any]]:
+        """Values of every output field for the given catalog rows."""
+        extra = self.extra_columns(indices)
+        records = self.catalog.records
+        row_records = [records[row] for row in indices.tolist()]
+        return {
+            name: extra[name] if name in extra else [record[name] for record in row_records]
+            for name in self.fields
+        }
     
-    conn.close()
+    def rows(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Output rows for the given catalog rows."""
+        columns = self.columns(indices)
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+    
+    def json_rows(self, indices: np.ndarray) -> List[bytes]:
+        """JSON-encoded rows; whole rows reuse the catalog's pre-serialized records."""
+        if not self.projected:
+            return self.catalog.encode_rows(indices, self.extra_columns(indices))
+        return [orjson.dumps(row) for row in self.rows(indices)]
+    
+    def arrow_schema(self):
+        """Arrow schema for the output fields, typed from catalog-wide samples."""
+        samples = {'distance_from_origin': 0.0, 'is_in_season': True, 'search_snippet': ''}
+        samples.update(self.catalog.field_samples)
+        return response_formats.arrow_schema({name: samples[name] for name in self.fields})
+    
+    def body(self, indices: np.ndarray) -> bytes:
+        """Encoded response body for a page of rows."""
+        if self.output_format == response_formats.MSGPACK:
+            return response_formats.encode_msgpack(self.rows(indices))
+        if self.output_format == response_formats.ARROW:
+            return response_formats.encode_arrow(self.columns(indices), self.arrow_schema())
+        return b'[' + b','.join(self.json_rows(indices)) + b']'
+    
+    def chunks(self, order: np.ndarray) -> Iterator[np.ndarray]:
+        """Ordered rows split into streaming chunks."""
+        for start in range(0, len(order), STREAM_CHUNK_SIZE):
+            yield order[start:start + STREAM_CHUNK_SIZE]
+    
+    def stream(self, order: np.ndarray) -> Iterator[bytes]:
+        """Yield every ordered row as one array (or Arrow stream), a chunk of rows at a time."""
+        if self.output_format == response_formats.MSGPACK:
+            yield from response_formats.stream_msgpack(len(order), map(self.rows, self.chunks(order)))
+        elif self.output_format == response_formats.ARROW:
+            yield from response_formats.stream_arrow(map(self.columns, self.chunks(order)), self.arrow_schema())
+        else:
+            yield b'['
+            for i, chunk in enumerate(self.chunks(order)):
+                yield (b',' if i else b'') + b','.join(self.json_rows(chunk))
+            yield b']'
+    
+    def stream_ndjson(self, order: np.ndarray) -> Iterator[bytes]:
+        """Yield every ordered row as newline-delimited JSON, a chunk of rows at a time."""
+        for chunk in self.chunks(order):
+            yield b'\n'.join(self.json_rows(chunk)) + b'\n'
+
+
+# Detail statements for a list of hike ids ({ids}, filled in by id_list_sql).
+# Rows of each hike's children come out in the order the indexes keep them:
+# peaks highest first, trailheads and seasons in insertion order
+HIKES_BY_ID = "SELECT * FROM hikes WHERE id IN ({ids})"
+HIKE_DETAIL_QUERIES = (
+    ('peaks', "SELECT hike_id, peak_name, elevation FROM peaks "
+              "WHERE hike_id IN ({ids}) ORDER BY hike_id, elevation DESC, id"),
+    ('trailheads', "SELECT hike_id, name, latitude, longitude, elevation FROM trailheads "
+                   "WHERE hike_id IN ({ids}) ORDER BY hike_id, id"),
+    ('climbing_seasons', "SELECT hike_id, start_month, end_month, season_text FROM climbing_seasons "
+                         "WHERE hike_id IN ({ids}) ORDER BY hike_id, id")
+)
+
+
+def fetch_hike_details(conn: sqlite3.Connection, hike_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Full details of every existing hike in hike_ids, keyed by id, using
+    one query per table however many ids are requested. The id list is
+    padded to a power of two so few distinct statements are ever prepared."""
+    unique_ids = list(dict.fromkeys(hike_ids))
+    if not unique_ids:
+        return {}
+    ids = padded_ids(unique_ids)
     
-    return results
+    # Get hike details
+    with span("query"):
+        cursor = query_planner.execute(conn, id_list_sql(HIKES_BY_ID, len(unique_ids)), ids)
+    with span("fetch"):
+        rows = cursor.fetchall()
+    hikes = {}
+    with span("post-process"):
+        for row in rows:
+            hike_dict = dict_from_row(row)
+            hike_dict.update(peaks=[], trailheads=[], climbing_seasons=[])
+            hikes[row['id']] = hike_dict
+    
+    # Attach peaks, trailheads and climbing seasons in one pass per table
+    for key, template in HIKE_DETAIL_QUERIES:
+        with span("query"):
+            cursor = query_planner.execute(conn, id_list_sql(template, len(unique_ids)), ids)
+        with span("fetch"):
+            rows = cursor.fetchall()
+        with span("post-process"):
+            for row in rows:
+                item = dict_from_row(row)
+                hikes[item.pop('hike_id')][key].append(item)
+    
+    # Check if hikes are in season
+    catalog = catalog_cache.current()
+    today = date.today()
+    with span("post-process"):
+        for hike_id, hike_dict in hikes.items():
+            row = catalog.row_index.get(hike_id)
+            hike_dict['is_in_season'] = row is not None and catalog.season_calendar.contains(
+                row, today, SEASON_BUFFER_DAYS
+            )
+    
+    record_rows(len(hikes))
+    return hikes
+
+
+def get_hike_batch(hike_ids: List[int]) -> List[Dict[str, Any]]:
+    """Details for each requested id in request order, with a not-found
+    marker in place of ids that do not exist."""
+    with pooled_connection() as conn:
+        hikes = fetch_hike_details(conn, hike_ids)
+    return [
+        hikes.get(hike_id) or {'id': hike_id, 'error': 'not_found'}
+        for hike_id in hike_ids
+    ]
+
+
+# Declared before /hikes/{hike_id} so "batch" is not taken for an id
+@app.get("/hikes/batch")
+@db_executor.asynchronous
+def get_hikes_batch(ids: str = Query(..., description="Comma-separated hike ids")) -> List[Dict[str, Any]]:
+    """Get detailed information for several hikes at once."""
+    try:
+        hike_ids = [int(part) for part in ids.split(',') if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(hike_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} ids per batch")
+    return get_hike_batch(hike_ids)
+
+
+@app.post("/hikes/batch")
+@db_executor.asynchronous
+def post_hikes_batch(ids: List[int] = Body(..., embed=True, max_length=MAX_BATCH_SIZE)) -> List[Dict[str, Any]]:
+    """Get detailed information for the hikes listed in the request body."""
+    return get_hike_batch(ids)
 
 
 @app.get("/hikes/{hike_id}")
+@db_executor.asynchronous
 def get_hike(hike_id: int) -> Dict[str, Any]:
     """Get detailed information for a single hike."""
+    with pooled_connection() as conn:
+        hikes = fetch_hike_details(conn, [hike_id])
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get hike details
-    cursor.execute("SELECT * FROM hikes WHERE id = ?", (hike_id,))
-    hike = cursor.fetchone()
-    
-    if not hike:
-        conn.close()
+    if hike_id not in hikes:
         raise HTTPException(status_code=404, detail="Hike not found")
     
-    hike_dict = dict_from_row(hike)
-    
-    # Get peaks
-    cursor.execute(
-        "SELECT peak_name, elevation FROM peaks WHERE hike_id = ? ORDER BY elevation DESC",
-        (hike_id,)
-    )
-    hike_dict['peaks'] = [dict_from_row(row) for row in cursor.fetchall()]
+    return hikes[hike_id]
+
+
+@app.get("/hikes/{hike_id}/similar")
+@db_executor.asynchronous
+def get_similar_hikes(
+    hike_id: int,
+    filters: HikeFilters = Depends(inline_dependency(HikeFilters)),
+    k: int = Query(10, ge=1, le=MAX_SIMILAR_HIKES)
+) -> List[Dict[str, Any]]:
+    """The k hikes most like hike_id in distance, gain, difficulty, class,
+    crowds, summit elevation, trailhead location and season, nearest first,
+    optionally limited to hikes matching the /hikes filters."""
+    catalog = catalog_cache.current()
+    row = catalog.row_index.get(hike_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Hike not found")
     
-    # Get trailheads
-    cursor.execute(
-        "SELECT name, latitude, longitude, elevation FROM trailheads WHERE hike_id = ?",
-        (hike_id,)
-    )
-    trailheads = cursor.fetchall()
-    hike_dict['trailheads'] = [dict_from_row(row) for row in trailheads]
+    with span("filter"):
+        selection = select_hikes(catalog, filters)
+        mask = None if selection.mask.all() else selection.mask
+    with span("search"):
+        rows, distances = catalog.similarity_index.nearest(row, k, mask)
+    
+    with span("serialize"):
+        extra_columns = HikeRowEncoder(catalog, selection).extra_columns(rows)
+        extra_columns['similarity_distance'] = [round(distance, 4) for distance in distances.tolist()]
+        body = b'[' + b','.join(catalog.encode_rows(rows, extra_columns)) + b']'
+    record_rows(len(rows))
+    return Response(body, media_type="application/json")
+
+
+@app.get("/trailheads/nearest")
+@db_executor.asynchronous
+def get_nearest_trailheads(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=100)
+) -> List[Dict[str, Any]]:
+    """Get the k trailheads closest to a point, nearest first."""
     
-    # Get climbing seasons
-    cursor.execute(
-        "SELECT start_month, end_month, season_text FROM climbing_seasons WHERE hike_id = ?",
-        (hike_id,)
-    )
-    hike_dict['climbing_seasons'] = [dict_from_row(row) for row in cursor.fetchall()]
+    catalog = catalog_cache.current()
+    indices, distances = catalog.trailhead_index.nearest(lat, lon, k)
     
-    # Check if hike is in season
-    hike_dict['is_in_season'] = False
-    for season in hike_dict['climbing_seasons']:
-        if is_in_season(season['start_month'], season['end_month']):
-            hike_dict['is_in_season'] = True
-            break
+    results = []
+    for i, distance in zip(indices.tolist(), distances.tolist()):
+        hike = catalog.records[i]
+        results.append({
+            'hike_id': hike['id'],
+            'hike_name': hike['name'],
+            'trailhead_name': catalog.trailhead_names[i],
+            'latitude': hike['latitude'],
+            'longitude': hike['longitude'],
+            'distance': round(distance, 1)
+        })
     
-    conn.close()
+    return results
+
+
+@app.get("/facets")
+@db_executor.asynchronous
+def get_facets(filters: HikeFilters = Depends(inline_dependency(HikeFilters))) -> Dict[str, Any]:
+    """Counts of the filtered hikes by difficulty, class, crowd level,
+    distance and elevation gain buckets, fourteener and in-season status."""
+    catalog = catalog_cache.current()
+    selection = select_hikes(catalog, filters)
+    return {
+        'total': int(np.count_nonzero(selection.mask)),
+        'facets': catalog.facet_index.counts(selection.mask, selection.in_season)
+    }
+
+
+@app.get("/plan")
+@db_executor.asynchronous
+def get_plan(
+    origin_lat: float = Query(DENVER_LAT, ge=-90, le=90),
+    origin_lon: float = Query(DENVER_LON, ge=-180, le=180),
+    max_drive_miles: float = Query(100, gt=0),
+    days: int = Query(2, ge=1, le=MAX_PLAN_DAYS),
+    daily_hours: float = Query(8, gt=0, le=24),
+    hikes_per_day: int = Query(1, ge=1, le=MAX_HIKES_PER_DAY),
+    # Which end of each hike's time range must fit the daily budget
+    time_estimate: str = Query("max", pattern="^(min|max)$"),
+    max_difficulty: Optional[float] = Query(None, ge=1, le=10),
+    max_class: Optional[float] = Query(None, ge=1, le=4),
+    season_date: Optional[date] = Query(None, alias="date"),
+    objective: str = Query("elevation", pattern=f"^({'|'.join(OBJECTIVES)})$"),
+    k: int = Query(5, ge=1, le=MAX_PLANS),
+    time_budget_ms: float = Query(PLAN_TIME_BUDGET_MS, gt=0, le=MAX_PLAN_TIME_BUDGET_MS)
+) -> Dict[str, Any]:
+    """Top k trips: sets of in-season hikes within driving range of the
+    origin, spread over the days so each day fits the hiking-time budget,
+    ranked by summed summit elevation, fourteener count or low crowds.
+    complete is false if the search hit its time budget, in which case the
+    plans are the best found in time."""
+    catalog = catalog_cache.current()
+    columns = catalog.columns
+    
+    # Candidates: hikes with a known time that fits in a day
+    with span("filter"):
+        distances = catalog.distances_from(origin_lat, origin_lon)
+        hours = columns['hiking_time_max' if time_estimate == "max" else 'hiking_time_min']
+        mask = (distances <= max_drive_miles) & (hours > 0) & (hours <= daily_hours)
+        mask &= catalog.season_calendar.in_season(season_date or date.today(), SEASON_BUFFER_DAYS)
+        if max_difficulty is not None:
+            mask &= columns['difficulty_rating'] <= max_difficulty
+        if max_class is not None:
+            mask &= columns['class_numeric'] <= max_class
+        
+        candidates = np.flatnonzero(mask)
+        scores = hike_scores(columns, objective)[candidates]
+        order = np.argsort(-scores, kind='stable')
+        candidates, scores = candidates[order], scores[order]
+    
+    with span("search"):
+        result = search_plans(
+            scores, hours[candidates], days, hikes_per_day, daily_hours, k, time_budget_ms / 1000
+        )
     
-    return hike_dict
+    plans = []
+    for plan in result.plans:
+        rows = candidates[list(plan.hikes)]
+        itinerary = []
+        for day, positions in enumerate(plan.schedule, start=1):
+            day_rows = candidates[list(positions)]
+            hikes = []
+            for row in day_rows.tolist():
+                record = catalog.records[row]
+                hike = {name: record[name] for name in PLAN_HIKE_FIELDS}
+                hike['distance_from_origin'] = float(distances[row])
+                hikes.append(hike)
+            itinerary.append({
+                'day': day,
+                'hiking_hours': round(float(hours[day_rows].sum()), 2),
+                'hikes': hikes
+            })
+        plans.append({
+            'score': round(plan.score, 6),
+            'hike_count': len(rows),
+            'fourteeners': int(np.count_nonzero(columns['highest_peak_elevation'][rows] >= FOURTEENER_ELEVATION)),
+            'total_hiking_hours': round(float(hours[rows].sum()), 2),
+            'total_elevation_gain': float(np.nansum(columns['total_elevation_gain'][rows])),
+            'days': itinerary
+        })
+    
+    record_rows(len(plans))
+    return {
+        'objective': objective,
+        'candidates': len(candidates),
+        'complete': result.complete,
+        'plans': plans
+    }
 
 
 @app.get("/stats")
+@db_executor.asynchronous
 def get_stats() -> Dict[str, Any]:
     """Get database statistics."""
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as total_hikes,
-            COUNT(CASE WHEN highest_peak_elevation >= 14000 THEN 1 END) as fourteeners,
-            AVG(round_trip_miles) as avg_distance,
-            AVG(total_elevation_gain) as avg_elevation_gain,
-            AVG(difficulty_rating) as avg_difficulty,
-            MIN(round_trip_miles) as shortest_distance,
-            MAX(round_trip_miles) as longest_distance,
-            MIN(highest_peak_elevation) as lowest_peak,
-            MAX(highest_peak_elevation) as highest_peak
-        FROM hikes_with_peaks
-    """)
-    
-    stats = dict_from_row(cursor.fetchone())
-    
-    # Get difficulty distribution
-    cursor.execute("""
-        SELECT difficulty_label, COUNT(*) as count
-        FROM hikes
-        GROUP BY difficulty_label
-        ORDER BY difficulty_rating
-    """)
-    stats['difficulty_distribution'] = [dict_from_row(row) for row in cursor.fetchall()]
-    
-    # Get class distribution
-    cursor.execute("""
-        SELECT class_text, COUNT(*) as count
-        FROM hikes
-        GROUP BY class_text
-        ORDER BY class_numeric
-    """)
-    stats['class_distribution'] = [dict_from_row(row) for row in cursor.fetchall()]
-    
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = query_planner.execute(conn, """
+            SELECT 
+                COUNT(*) as total_hikes,
+                COUNT(CASE WHEN highest_peak_elevation >= 14000 THEN 1 END) as fourteeners,
+                AVG(round_trip_miles) as avg_distance,
+                AVG(total_elevation_gain) as avg_elevation_gain,
+                AVG(difficulty_rating) as avg_difficulty,
+                MIN(round_trip_miles) as shortest_distance,
+                MAX(round_trip_miles) as longest_distance,
+                MIN(highest_peak_elevation) as lowest_peak,
+                MAX(highest_peak_elevation) as highest_peak
+            FROM hike_summaries
+        """, full_scan_expected=True)
+        
+        stats = dict_from_row(cursor.fetchone())
+        
+        # Get difficulty distribution. Each label has one rating (and each
+        # class text one number), so grouping by both reads the covering
+        # index in order instead of sorting twice
+        cursor = query_planner.execute(conn, """
+            SELECT difficulty_label, COUNT(*) as count
+            FROM hike_summaries
+            GROUP BY difficulty_rating, difficulty_label
+            ORDER BY difficulty_rating, difficulty_label
+        """, full_scan_expected=True)
+        stats['difficulty_distribution'] = [dict_from_row(row) for row in cursor.fetchall()]
+        
+        # Get class distribution
+        cursor = query_planner.execute(conn, """
+            SELECT class_text, COUNT(*) as count
+            FROM hike_summaries
+            GROUP BY class_numeric, class_text
+            ORDER BY class_numeric, class_text
+        """, full_scan_expected=True)
+        stats['class_distribution'] = [dict_from_row(row) for row in cursor.fetchall()]
+    
+    # Data generation being served, as in the X-Data-Generation header
+    stats['generation'] = catalog_cache.current().generation_label
     
     return stats
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Request, stage and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     
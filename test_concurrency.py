@@ -0,0 +1,77 @@
+"""
+Blocking work on the API's dedicated executor.
+"""
+
+import asyncio
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+import simple_api
+from concurrency import BlockingExecutor
+
+
+def test_iterate_produces_every_item_on_the_pool():
+    executor = BlockingExecutor(2, thread_name_prefix="test-pool")
+    threads = []
+
+    def numbers():
+        for number in range(5):
+            threads.append(threading.current_thread().name)
+            yield number
+
+    async def collect():
+        return [number async for number in executor.iterate(numbers())]
+
+    try:
+        assert asyncio.run(collect()) == [0, 1, 2, 3, 4]
+    finally:
+        executor.shutdown()
+    assert threads and all(name.startswith("test-pool") for name in threads)
+
+
+def test_iterate_closes_the_iterator_on_the_pool_when_stopped_early():
+    executor = BlockingExecutor(1, thread_name_prefix="test-pool")
+    closed_on = []
+
+    def numbers():
+        try:
+            yield from range(100)
+        finally:
+            closed_on.append(threading.current_thread().name)
+
+    async def first_two():
+        items = executor.iterate(numbers())
+        try:
+            return [await items.__anext__(), await items.__anext__()]
+        finally:
+            await items.aclose()
+
+    try:
+        assert asyncio.run(first_two()) == [0, 1]
+    finally:
+        executor.shutdown()
+    assert len(closed_on) == 1 and closed_on[0].startswith("test-pool")
+
+
+def test_streamed_responses_are_encoded_on_the_database_executor(monkeypatch):
+    threads = set()
+    stream_ndjson = simple_api.HikeRowEncoder.stream_ndjson
+
+    def recording_stream_ndjson(self, order):
+        for chunk in stream_ndjson(self, order):
+            threads.add(threading.current_thread().name)
+            yield chunk
+
+    monkeypatch.setattr(simple_api.HikeRowEncoder, 'stream_ndjson', recording_stream_ndjson)
+    simple_api.response_cache.clear()
+    with TestClient(simple_api.app) as client:
+        expected = [hike['id'] for hike in client.get('/hikes', params={'limit': simple_api.MAX_PAGE_SIZE}).json()]
+        streamed = client.get('/hikes', params={'format': 'ndjson', 'limit': 1})
+        array = client.get('/hikes', params={'stream': 'true'})
+    simple_api.response_cache.clear()
+
+    assert [json.loads(line)['id'] for line in streamed.text.splitlines()] == expected
+    assert [hike['id'] for hike in array.json()] == expected
+    assert threads and all(name.startswith("summit-hikes-db") for name in threads)
@@ -0,0 +1,128 @@
+"""
+Cursor pagination of /hikes against a database with missing values and ties.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import import_data
+import simple_api
+from hike_catalog import CatalogCache
+
+SQL_SORT_KEYS = [
+    'number', 'name', 'difficulty_rating', 'round_trip_miles', 'total_elevation_gain',
+    'highest_peak_elevation', 'class_numeric', 'hiking_time_min', 'hiking_time_max'
+]
+COMPUTED_SORT_KEYS = ['distance_from_denver', 'distance_from_origin']
+PAGE_SIZE = 4
+
+
+@pytest.fixture(scope='module')
+def db_path(tmp_path_factory):
+    """The bundled hikes imported with some peaks and trailheads removed, so
+    highest_peak_elevation and the distances have NULLs among their ties."""
+    hikes = json.loads((Path(__file__).parent / 'hikes.json').read_text())
+    for hike in hikes[::7]:
+        hike.pop('peak_elevation', None)
+    for hike in hikes[3::6]:
+        hike.pop('trailhead_gps', None)
+    directory = tmp_path_factory.mktemp('pagination')
+    source = directory / 'hikes.json'
+    source.write_text(json.dumps(hikes))
+    db_path = directory / 'hikes.db'
+    import_data.import_hikes(source, db_path)
+    return db_path
+
+
+@pytest.fixture
+def client(db_path, monkeypatch):
+    monkeypatch.setattr(
+        simple_api, 'catalog_cache', CatalogCache(db_path, simple_api.DENVER_LAT, simple_api.DENVER_LON)
+    )
+    simple_api.response_cache.clear()
+    with TestClient(simple_api.app) as client:
+        yield client
+    simple_api.response_cache.clear()
+
+
+def walk(client, params):
+    """Ids of every hike, fetched page by page through X-Next-Cursor."""
+    ids = []
+    response = client.get('/hikes', params={**params, 'limit': PAGE_SIZE})
+    while True:
+        assert response.status_code == 200
+        ids += [hike['id'] for hike in response.json()]
+        cursor = response.headers.get('x-next-cursor')
+        if cursor is None:
+            return ids
+        response = client.get('/hikes', params={**params, 'limit': PAGE_SIZE, 'cursor': cursor})
+
+
+def all_hikes(client, params):
+    response = client.get('/hikes', params={**params, 'limit': simple_api.MAX_PAGE_SIZE})
+    assert response.status_code == 200
+    assert 'x-next-cursor' not in response.headers
+    return response.json()
+
+
+def test_fixture_has_nulls_and_ties(db_path):
+    with sqlite3.connect(db_path) as conn:
+        null_peaks, = conn.execute('SELECT COUNT(*) FROM hike_summaries WHERE highest_peak_elevation IS NULL').fetchone()
+        null_locations, = conn.execute('SELECT COUNT(*) FROM hike_summaries WHERE latitude IS NULL').fetchone()
+        tied, = conn.execute('SELECT COUNT(*) - COUNT(DISTINCT difficulty_rating) FROM hike_summaries').fetchone()
+    assert null_peaks > 1 and null_locations > 1 and tied > 0
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', SQL_SORT_KEYS)
+def test_cursor_walk_matches_sqlite_order(client, db_path, sort_by, sort_order):
+    with sqlite3.connect(db_path) as conn:
+        expected = [row[0] for row in conn.execute(f'SELECT id FROM hike_summaries ORDER BY {sort_by}, id')]
+    if sort_order == 'desc':
+        expected.reverse()
+
+    params = {'sort_by': sort_by, 'sort_order': sort_order}
+    assert [hike['id'] for hike in all_hikes(client, params)] == expected
+    assert walk(client, params) == expected
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', COMPUTED_SORT_KEYS)
+def test_cursor_walk_matches_full_order_of_computed_keys(client, sort_by, sort_order):
+    params = {'sort_by': sort_by, 'sort_order': sort_order, 'origin_lat': 39.0, 'origin_lon': -106.0}
+    hikes = all_hikes(client, params)
+    keys = [hike[sort_by] for hike in hikes]
+    if sort_order == 'desc':
+        keys.reverse()
+    nulls = keys.count(None)
+    assert nulls > 1 and keys[:nulls] == [None] * nulls
+    assert keys[nulls:] == sorted(keys[nulls:])
+
+    assert walk(client, params) == [hike['id'] for hike in hikes]
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+def test_cursor_walk_matches_full_order_by_relevance(client, sort_order):
+    params = {'search': 'peak', 'sort_by': 'relevance', 'sort_order': sort_order}
+    expected = [hike['id'] for hike in all_hikes(client, params)]
+    assert len(expected) > PAGE_SIZE
+    assert walk(client, params) == expected
+
+
+@pytest.mark.parametrize('other', [
+    {'sort_by': 'number', 'sort_order': 'asc'},
+    {'sort_by': 'name', 'sort_order': 'desc'}
+])
+def test_cursor_from_another_sort_order_is_rejected(client, other):
+    response = client.get('/hikes', params={'sort_by': 'name', 'sort_order': 'asc', 'limit': PAGE_SIZE})
+    cursor = response.headers['x-next-cursor']
+    response = client.get('/hikes', params={**other, 'limit': PAGE_SIZE, 'cursor': cursor})
+    assert response.status_code == 400
+
+
+def test_malformed_cursor_is_rejected(client):
+    assert client.get('/hikes', params={'cursor': 'not-a-cursor'}).status_code == 400
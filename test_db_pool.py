@@ -0,0 +1,51 @@
+"""
+Connection pooling for the summit hikes API.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from db_pool import ActivePool, ConnectionPool
+
+BUNDLED_DB = Path(__file__).parent / 'summit_hikes.db'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = tmp_path / 'hikes.db'
+    shutil.copyfile(BUNDLED_DB, db_path)
+    return db_path
+
+
+def test_connections_released_after_close_are_closed(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    idle = pool.acquire()
+    borrowed = pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    pool.release(borrowed)
+
+    assert pool._idle == []
+    for conn in (idle, borrowed):
+        with pytest.raises(Exception, match='closed'):
+            conn.execute('SELECT 1')
+
+
+def test_active_pool_reopens_after_close(db_path):
+    active = ActivePool(db_path, size=2)
+    closed = active.current()
+    conn = closed.acquire()
+
+    active.close()
+    closed.release(conn)
+
+    assert closed._idle == []
+    reopened = active.current()
+    assert reopened is not closed
+    conn = reopened.acquire()
+    assert conn.execute('SELECT COUNT(*) FROM hikes').fetchone()[0] > 0
+    reopened.release(conn)
+    assert reopened._idle == [conn]
@@ -0,0 +1,33 @@
+"""
+Loading the hike catalog from the database and its snapshot.
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from geo import DENVER_LAT, DENVER_LON
+from hike_catalog import load_catalog, read_catalog, write_catalog_snapshot
+
+BUNDLED_DB = Path(__file__).parent / 'summit_hikes.db'
+
+
+def test_reading_a_missing_database_does_not_create_it(tmp_path):
+    db_path = tmp_path / 'missing.db'
+    with pytest.raises(sqlite3.OperationalError):
+        read_catalog(db_path, DENVER_LAT, DENVER_LON, (0, 0, 0))
+    assert not db_path.exists()
+
+
+def test_snapshot_and_database_give_the_same_catalog(tmp_path):
+    db_path = tmp_path / 'hikes.db'
+    shutil.copyfile(BUNDLED_DB, db_path)
+    from_database = load_catalog(db_path, DENVER_LAT, DENVER_LON)
+
+    write_catalog_snapshot(db_path, DENVER_LAT, DENVER_LON)
+    from_snapshot = load_catalog(db_path, DENVER_LAT, DENVER_LON)
+
+    assert len(from_snapshot) == len(from_database) > 0
+    assert [dict(record) for record in from_snapshot.records] == [dict(record) for record in from_database.records]
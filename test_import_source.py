@@ -0,0 +1,58 @@
+"""
+Streaming of source hike files by import_data.
+"""
+
+import io
+import json
+
+import pytest
+
+import import_data
+
+
+class CountingDecoder(json.JSONDecoder):
+    """JSONDecoder counting raw_decode calls, failed or not."""
+    calls = 0
+
+    def raw_decode(self, s, idx=0):
+        CountingDecoder.calls += 1
+        return super().raw_decode(s, idx)
+
+
+def read_array(text: str, chunk_size: int = 4):
+    return list(import_data.iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('[]', []),
+    (' \n[ ]\n', []),
+    ('[{"a": 1}]', [{'a': 1}]),
+    ('[ {"a": 1} ,\n{"b": [2, 3]} ]', [{'a': 1}, {'b': [2, 3]}]),
+    ('[12345, 6789, "x,]"]', [12345, 6789, 'x,]'])
+])
+def test_reads_every_element_whatever_the_chunk_size(text, expected):
+    for chunk_size in (1, 2, 3, 7, 1024):
+        assert read_array(text, chunk_size) == expected
+
+
+@pytest.mark.parametrize('text', [
+    '[,{"a": 1}]',
+    '[{"a": 1},,{"b": 2}]',
+    '[{"a": 1},]',
+    '[{"a": 1} {"b": 2}]',
+    '[,]',
+    '{"a": 1}',
+    '[{"a": 1}',
+    '[{"a": 1},'
+])
+def test_malformed_arrays_are_rejected(text):
+    with pytest.raises(ValueError):
+        read_array(text)
+
+
+def test_an_element_spanning_many_chunks_is_decoded_a_few_times(monkeypatch):
+    monkeypatch.setattr(import_data.json, 'JSONDecoder', CountingDecoder)
+    CountingDecoder.calls = 0
+    element = {'description': 'x' * 100_000}
+    assert read_array(json.dumps([element, element]), chunk_size=64) == [element, element]
+    assert CountingDecoder.calls < 40
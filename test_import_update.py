@@ -0,0 +1,120 @@
+"""
+In-place updates by import_data against fresh imports of the same source.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import import_data
+from hike_catalog import database_generation
+
+SOURCE_HIKES = json.loads((Path(__file__).parent / 'hikes.json').read_text())
+
+# Tables compared row by row; child tables without their surrogate ids,
+# which an update allocates differently from a fresh import
+CONTENT_QUERIES = {
+    'hikes': 'SELECT * FROM hikes ORDER BY id',
+    'peaks': 'SELECT hike_id, peak_name, elevation, is_primary FROM peaks ORDER BY 1, 2, 3, 4',
+    'trailheads': 'SELECT hike_id, name, latitude, longitude, elevation FROM trailheads ORDER BY 1, 2, 3, 4, 5',
+    'climbing_seasons': 'SELECT hike_id, start_month, end_month, season_text FROM climbing_seasons ORDER BY 1, 2, 3, 4',
+    'hike_summaries': 'SELECT * FROM hike_summaries ORDER BY id',
+    'hike_hashes': 'SELECT * FROM hike_hashes ORDER BY number'
+}
+
+
+def write_source(path: Path, hikes) -> Path:
+    path.write_text(json.dumps(hikes))
+    return path
+
+
+def database_contents(db_path: Path):
+    """Every table's rows plus the full-text index itself (as term
+    instances read from the index, not from the content table)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        contents = {table: conn.execute(query).fetchall() for table, query in CONTENT_QUERIES.items()}
+        conn.execute('CREATE VIRTUAL TABLE temp.fts_terms USING fts5vocab(main, hikes_fts, instance)')
+        contents['hikes_fts'] = conn.execute('SELECT * FROM temp.fts_terms ORDER BY 1, 2, 3, 4').fetchall()
+        conn.execute("INSERT INTO hikes_fts (hikes_fts) VALUES ('integrity-check')")
+        contents['triggers'] = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+        ).fetchall()
+    finally:
+        conn.close()
+    return contents
+
+
+def edited_hikes():
+    """The source with hikes deleted, hikes changed and new hikes added."""
+    hikes = [dict(hike) for hike in SOURCE_HIKES if hike['number'] % 10 != 3]
+    for hike in hikes[::9]:
+        hike['description'] = 'Glissade down the snowfield after a scramble to the summit.'
+        hike['difficulty'] = '9/10'
+    hikes[5].pop('trailhead_gps', None)
+    for offset, template in enumerate(SOURCE_HIKES[:3], start=1):
+        hikes.append(dict(template, number=1000 + offset, name=f'NEW SUMMIT {offset}'))
+    return hikes
+
+
+def test_reimporting_an_unchanged_source_writes_nothing(tmp_path):
+    source = write_source(tmp_path / 'hikes.json', SOURCE_HIKES)
+    db_path = tmp_path / 'hikes.db'
+    import_data.import_hikes(source, db_path)
+    generation = database_generation(db_path)
+    contents = db_path.read_bytes()
+
+    import_data.update_hikes(source, db_path)
+
+    assert database_generation(db_path) == generation
+    assert db_path.read_bytes() == contents
+
+
+@pytest.mark.parametrize('batch_size', [1, import_data.DEFAULT_BATCH_SIZE])
+def test_update_matches_a_fresh_import(tmp_path, batch_size):
+    original = write_source(tmp_path / 'original.json', SOURCE_HIKES)
+    edited = write_source(tmp_path / 'edited.json', edited_hikes())
+    updated_db = tmp_path / 'updated.db'
+    fresh_db = tmp_path / 'fresh.db'
+    import_data.import_hikes(original, updated_db)
+    import_data.import_hikes(edited, fresh_db)
+
+    import_data.update_hikes(edited, updated_db, batch_size)
+
+    updated = database_contents(updated_db)
+    assert updated == database_contents(fresh_db)
+    assert len(updated['hikes']) == len(edited_hikes())
+    with sqlite3.connect(updated_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM hikes_fts WHERE hikes_fts MATCH 'glissade'").fetchone()[0] > 1
+
+
+def test_update_repairs_a_database_left_without_full_text_triggers(tmp_path):
+    source = write_source(tmp_path / 'hikes.json', SOURCE_HIKES)
+    fresh_db = tmp_path / 'fresh.db'
+    import_data.import_hikes(source, fresh_db)
+
+    # What an import failing in its first batch used to leave behind
+    half_built_db = tmp_path / 'half_built.db'
+    schema, _ = import_data.split_schema((Path(import_data.__file__).parent / 'database_schema.sql').read_text())
+    with sqlite3.connect(half_built_db) as conn:
+        for statement in schema:
+            conn.execute(statement)
+    conn.close()
+
+    import_data.update_hikes(source, half_built_db)
+
+    assert database_contents(half_built_db) == database_contents(fresh_db)
+
+
+def test_update_refuses_an_interrupted_import(tmp_path):
+    source = write_source(tmp_path / 'hikes.json', SOURCE_HIKES)
+    db_path = tmp_path / 'hikes.db'
+    import_data.import_hikes(source, db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO import_progress (id, source, hikes_committed, last_number) VALUES (1, ?, 0, 0)", (str(source),))
+    conn.close()
+
+    with pytest.raises(ValueError, match='--resume'):
+        import_data.update_hikes(source, db_path)
@@ -0,0 +1,40 @@
+"""
+Response cache behaviour of the summit hikes API against the bundled database.
+"""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import simple_api
+
+
+def fixed_today(day: date):
+    """A date class whose today() is day."""
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return day
+    return FixedDate
+
+
+@pytest.fixture
+def client():
+    simple_api.response_cache.clear()
+    with TestClient(simple_api.app) as client:
+        yield client
+    simple_api.response_cache.clear()
+
+
+def test_date_dependent_responses_expire_when_the_day_changes(client, monkeypatch):
+    monkeypatch.setattr(simple_api, 'date', fixed_today(date(2024, 1, 15)))
+    winter = client.get('/hikes', params={'in_season_only': 'true'})
+    assert client.get('/hikes', params={'in_season_only': 'true'}).headers['etag'] == winter.headers['etag']
+
+    monkeypatch.setattr(simple_api, 'date', fixed_today(date(2024, 7, 15)))
+    summer = client.get('/hikes', params={'in_season_only': 'true'})
+
+    assert summer.status_code == winter.status_code == 200
+    assert len(summer.json()) > len(winter.json())
+    assert summer.headers['etag'] != winter.headers['etag']
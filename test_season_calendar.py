@@ -0,0 +1,52 @@
+"""
+Climbing season calendar against day-by-day date arithmetic.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from season_calendar import SeasonCalendar
+
+SEASONS = [[(3, 10)], [(11, 2)], [(12, 2), (6, 6)], [(1, 12)], []]
+
+
+def reference_in_season(seasons, day: date, buffer_days: int) -> bool:
+    """Whether any date within buffer_days of day falls in a season month."""
+    months = set()
+    for start_month, end_month in seasons:
+        month = start_month
+        months.add(month)
+        while month != end_month:
+            month = month % 12 + 1
+            months.add(month)
+    return any(
+        (day + timedelta(days=offset)).month in months
+        for offset in range(-buffer_days, buffer_days + 1)
+    )
+
+
+@pytest.mark.parametrize('year', [2024, 2026])
+@pytest.mark.parametrize('buffer_days', [0, 1, 15, 45])
+def test_in_season_matches_date_arithmetic(year, buffer_days):
+    season_calendar = SeasonCalendar(SEASONS)
+    day = date(year, 1, 1)
+    while day.year == year:
+        expected = [reference_in_season(seasons, day, buffer_days) for seasons in SEASONS]
+        assert season_calendar.in_season(day, buffer_days).tolist() == expected, day
+        day += timedelta(days=1)
+
+
+def test_buffer_before_march_counts_the_days_february_has():
+    season_calendar = SeasonCalendar([[(3, 10)]])
+    assert season_calendar.contains(0, date(2026, 2, 14), 15)
+    assert not season_calendar.contains(0, date(2026, 2, 13), 15)
+    assert season_calendar.contains(0, date(2024, 2, 15), 15)
+    assert not season_calendar.contains(0, date(2024, 2, 14), 15)
+
+
+def test_snapshot_bitmap_round_trips():
+    season_calendar = SeasonCalendar(SEASONS)
+    restored = SeasonCalendar.from_bitmap(season_calendar.bitmap.ravel())
+    for day in (date(2026, 2, 14), date(2024, 2, 29), date(2026, 12, 20)):
+        assert restored.in_season(day, 15).tolist() == season_calendar.in_season(day, 15).tolist()
@@ -0,0 +1,199 @@
+"""
+Trip planning over the in-memory hike catalog.
+Picks the sets of hikes that score best under an objective while fitting a
+number of days, hikes per day and a daily hiking-time budget. Candidates are
+searched best-first with branch-and-bound: a branch is cut as soon as the
+best scores left cannot beat the current top k, and the search stops early
+(returning the best plans so far) once its time budget runs out.
+"""
+
+import heapq
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hike_facets import FOURTEENER_ELEVATION
+
+OBJECTIVES = ('elevation', 'fourteeners', 'low_crowds')
+
+# Crowd levels run from 1 (lowest) to this
+MAX_CROWD_LEVEL = 5
+
+# Summit elevation is divided by this and added to count-like scores, so
+# ties go to higher summits without outweighing a whole fourteener
+TIE_BREAK_SCALE = 1_000_000
+
+# Search nodes expanded between checks of the time budget
+DEADLINE_CHECK_INTERVAL = 256
+
+# Placements tried when repacking a set of hikes into days before giving up
+MAX_PACKING_STEPS = 2000
+
+
+class Plan(NamedTuple):
+    """A set of candidate positions, its total score and the positions
+    hiked on each day."""
+    score: float
+    hikes: Tuple[int, ...]
+    schedule: Tuple[Tuple[int, ...], ...]
+
+
+class PlanSearchResult(NamedTuple):
+    plans: List[Plan]
+    complete: bool
+    nodes: int
+
+
+class PackingLimitReached(Exception):
+    """Raised when pack_days gives up after max_steps placements."""
+
+
+def hike_scores(columns, objective: str) -> np.ndarray:
+    """Score of every catalog hike under an objective; a plan scores the sum."""
+    elevation = np.nan_to_num(columns['highest_peak_elevation'])
+    if objective == 'elevation':
+        return elevation
+    tie_break = elevation / TIE_BREAK_SCALE
+    if objective == 'fourteeners':
+        return (elevation >= FOURTEENER_ELEVATION) + tie_break
+    if objective == 'low_crowds':
+        # Unknown crowd levels count as the busiest
+        crowd = np.nan_to_num(columns['crowd_level_numeric'], nan=MAX_CROWD_LEVEL)
+        return (MAX_CROWD_LEVEL + 1 - crowd) + tie_break
+    raise ValueError(f"Unknown objective {objective!r}")
+
+
+def pack_days(
+    hours: Sequence[float],
+    days: int,
+    hikes_per_day: int,
+    daily_hours: float,
+    max_steps: Optional[int] = None
+) -> Optional[List[List[int]]]:
+    """Assign hikes (by position in hours) to days so no day has more than
+    hikes_per_day hikes or daily_hours of hiking, or None if impossible.
+    Raises PackingLimitReached if max_steps placements do not settle it."""
+    if len(hours) > days * hikes_per_day or sum(hours) > days * daily_hours:
+        return None
+    order = sorted(range(len(hours)), key=lambda i: -hours[i])
+    loads = [0.0] * days
+    assignment: List[List[int]] = [[] for _ in range(days)]
+    failed = set()
+    steps = 0
+
+    def place(position: int) -> bool:
+        nonlocal steps
+        if position == len(order):
+            return True
+        # Which day holds what does not matter, only the multiset of days
+        state = (position, tuple(sorted(zip(loads, map(len, assignment)))))
+        if state in failed:
+            return False
+        steps += 1
+        if max_steps is not None and steps > max_steps:
+            raise PackingLimitReached()
+
+        hike = order[position]
+        tried = set()
+        for day in range(days):
+            # Days in the same state are interchangeable; try only one
+            day_state = (loads[day], len(assignment[day]))
+            if day_state in tried or len(assignment[day]) >= hikes_per_day or loads[day] + hours[hike] > daily_hours:
+                continue
+            tried.add(day_state)
+            loads[day] += hours[hike]
+            assignment[day].append(hike)
+            if place(position + 1):
+                return True
+            loads[day] -= hours[hike]
+            assignment[day].pop()
+        failed.add(state)
+        return False
+
+    if not place(0):
+        return None
+    return [sorted(day) for day in assignment]
+
+
+def search_plans(
+    scores: np.ndarray,
+    hours: np.ndarray,
+    days: int,
+    hikes_per_day: int,
+    daily_hours: float,
+    k: int,
+    time_budget: float,
+    max_packing_steps: int = MAX_PACKING_STEPS
+) -> PlanSearchResult:
+    """The k highest-scoring feasible sets of candidates, best first.
+    scores must be sorted in descending order (hours in the same order).
+    complete is False if time_budget seconds ran out before the search
+    finished (or a set could not be packed into days within
+    max_packing_steps), in which case the plans are the best found."""
+    deadline = time.monotonic() + time_budget
+    max_hikes = days * hikes_per_day
+    score_list = scores.tolist()
+    hour_list = hours.tolist()
+    # Best possible addition of r more hikes from position j is the sum of
+    # the r scores from j, as they are sorted
+    prefix = np.concatenate(([0.0], np.cumsum(scores))).tolist()
+    count = len(score_list)
+
+    best: List[Plan] = []  # min-heap of the top k
+    chosen: List[int] = []
+    nodes = 0
+    complete = True
+
+    def threshold() -> float:
+        return best[0].score if len(best) == k else float('-inf')
+
+    def add_to_schedule(j: int, schedule: Tuple[Tuple[int, ...], ...]) -> Optional[Tuple[Tuple[int, ...], ...]]:
+        """schedule with candidate j added to the first day it fits, or
+        repacked from scratch if it fits no day as things stand."""
+        nonlocal complete
+        for day, hikes in enumerate(schedule):
+            if len(hikes) < hikes_per_day and sum(hour_list[i] for i in hikes) + hour_list[j] <= daily_hours:
+                return schedule[:day] + (hikes + (j,),) + schedule[day + 1:]
+        hikes = [i for day in schedule for i in day] + [j]
+        try:
+            packed = pack_days([hour_list[i] for i in hikes], days, hikes_per_day, daily_hours, max_packing_steps)
+        except PackingLimitReached:
+            complete = False
+            return None
+        if packed is None:
+            return None
+        return tuple(tuple(hikes[i] for i in day) for day in packed)
+
+    def expand(start: int, score: float, schedule: Tuple[Tuple[int, ...], ...]) -> bool:
+        """Try adding each candidate from start on; returns False to stop."""
+        nonlocal nodes, complete
+        slots = max_hikes - len(chosen)
+        for j in range(start, count):
+            if score + prefix[min(j + slots, count)] - prefix[j] <= threshold():
+                # Later candidates score no more, so nothing further can win
+                break
+
+            nodes += 1
+            if nodes % DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+                complete = False
+                return False
+
+            new_schedule = add_to_schedule(j, schedule)
+            if new_schedule is None:
+                continue
+            chosen.append(j)
+            total = score + score_list[j]
+            if total > threshold():
+                plan = Plan(total, tuple(chosen), new_schedule)
+                if len(best) == k:
+                    heapq.heapreplace(best, plan)
+                else:
+                    heapq.heappush(best, plan)
+            if slots > 1 and not expand(j + 1, total, new_schedule):
+                return False
+            chosen.pop()
+        return True
+
+    expand(0, 0.0, ((),) * days)
+    return PlanSearchResult(sorted(best, reverse=True), complete, nodes)